@@ -1,4 +1,9 @@
+import hashlib
+import importlib.util
+import shutil
 import sqlite3
+import threading
+from functools import lru_cache
 import pandas as pd
 from pathlib import Path
 
@@ -6,6 +11,60 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 DB_PATH = PROJECT_ROOT / "data" / "taxi.db"
 
+# Results survive restarts here, one subfolder per DB build (see _disk_cache_dir).
+# Stored as Feather, which can't execute code on load (unlike pickle), so the
+# disk layer is only used when pyarrow is installed (the `cache` extra).
+RESULT_CACHE_DIR = PROJECT_ROOT / "data" / ".cache" / "results"
+_DISK_CACHE = importlib.util.find_spec("pyarrow") is not None
+
+# One read-only connection per thread (same approach as
+# symbiote_lite.sql.executor): the schema, page cache and mmap stay warm
+# across queries instead of being rebuilt on every call.
+_local = threading.local()
+
+# 256 MiB page cache, in-memory temp B-trees, 1 GiB mmap, and query_only as a
+# second guard behind the SELECT check. WAL is set by create_sqlite_db.py.
+_READ_PRAGMAS = (
+    "PRAGMA cache_size=-262144",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=1073741824",
+    "PRAGMA query_only=1",
+)
+
+
+# Queries whose result can change between identical calls skip the cache
+_VOLATILE_SQL = ("random(", "current_timestamp", "current_date", "current_time", "'now'")
+
+
+def _db_key() -> tuple:
+    # Key on inode and mtime too so a rebuilt DB file gets a fresh connection and cache
+    st = DB_PATH.stat()
+    return (str(DB_PATH), st.st_ino, st.st_mtime_ns)
+
+
+def _get_connection() -> sqlite3.Connection:
+    key = _db_key()
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "key", None) != key:
+        if conn is not None:
+            conn.close()
+        conn = sqlite3.connect(f"{DB_PATH.as_uri()}?mode=ro", uri=True)
+        for pragma in _READ_PRAGMAS:
+            conn.execute(pragma)
+        _local.conn, _local.key = conn, key
+    return conn
+
+
+def table_columns(table: str) -> frozenset:
+    """Column names of `table` in the current DB build."""
+    return _table_columns(table, _db_key())
+
+
+@lru_cache(maxsize=8)
+def _table_columns(table: str, db_key: tuple) -> frozenset:
+    rows = _get_connection().execute(f"PRAGMA table_info({table})").fetchall()
+    return frozenset(row[1] for row in rows)
+
 
 def execute_sql_query(sql: str) -> pd.DataFrame:
     """
@@ -19,11 +78,45 @@ def execute_sql_query(sql: str) -> pd.DataFrame:
     if not sql_clean.startswith("select"):
         raise ValueError("Only SELECT queries are allowed.")
 
-    conn = sqlite3.connect(DB_PATH)
+    if any(v in sql_clean for v in _VOLATILE_SQL):
+        return pd.read_sql_query(sql, _get_connection())
+    # The DB is read-only here, so identical SQL gives an identical result;
+    # hand out copies so callers can't mutate the cached frame. Keyed on the
+    # exact text: build_sql renders the same plan byte-for-byte every time.
+    return _cached_query(sql, _db_key()).copy()
 
-    try:
-        df = pd.read_sql_query(sql, conn)
-    finally:
-        conn.close()
 
+@lru_cache(maxsize=64)
+def _cached_query(sql: str, db_key: tuple) -> pd.DataFrame:
+    if not _DISK_CACHE:
+        return pd.read_sql_query(sql, _get_connection())
+    path = _disk_cache_dir(db_key) / f"{hashlib.blake2b(sql.encode(), digest_size=16).hexdigest()}.feather"
+    try:
+        return pd.read_feather(path)
+    except FileNotFoundError:
+        pass
+    except Exception:
+        # Corrupt or truncated (killed mid-write on a filesystem without an
+        # atomic replace): drop it so the fresh result below takes its place
+        path.unlink(missing_ok=True)
+    df = pd.read_sql_query(sql, _get_connection())
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        df.to_feather(tmp)
+        tmp.replace(path)
+    except Exception:
+        pass  # Cache is best-effort (read-only checkout, unsupported dtype)
     return df
+
+
+@lru_cache(maxsize=1)
+def _disk_cache_dir(db_key: tuple) -> Path:
+    # Named after the DB build; results cached for older builds are removed
+    # the first time a new build is seen
+    build = hashlib.blake2b(repr(db_key).encode(), digest_size=8).hexdigest()
+    if RESULT_CACHE_DIR.is_dir():
+        for old in RESULT_CACHE_DIR.iterdir():
+            if old.name != build:
+                shutil.rmtree(old, ignore_errors=True)
+    return RESULT_CACHE_DIR / build
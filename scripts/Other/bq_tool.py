@@ -1,6 +1,23 @@
 from google.cloud import bigquery
 import pandas as pd
 from datetime import datetime
+from functools import lru_cache
+from typing import Any, Iterator
+
+@lru_cache(maxsize=1)
+def _bq_client() -> bigquery.Client:
+    # Credential discovery and the HTTP session are paid once per process
+    return bigquery.Client()
+
+@lru_cache(maxsize=1)
+def _bqstorage_client():
+    # Storage Read API streams results as Arrow instead of paging JSON rows;
+    # optional (google-cloud-bigquery-storage), so fall back to REST without it
+    try:
+        from google.cloud import bigquery_storage
+    except ImportError:
+        return None
+    return bigquery_storage.BigQueryReadClient()
 
 def run_bigquery (sql: str) -> pd.DataFrame:
     """
@@ -13,18 +30,40 @@ def run_bigquery (sql: str) -> pd.DataFrame:
         pd.DataFrame: Query results.
     """
 
+    query_job = _start_query(sql)
+    bqstorage = _bqstorage_client()
+    df = query_job.to_dataframe( # convert the results to a pandas DataFrame
+        bqstorage_client=bqstorage,
+        create_bqstorage_client=False,
+    )
+
+    return df
+
+def run_bigquery_batches(sql: str) -> Iterator[Any]:
+    """
+    Run a BigQuery SQL query and stream the results.
+
+    Args:
+        sql (str): SQL query to execute.
+
+    Returns:
+        Iterator[pyarrow.RecordBatch]: Result batches, downloaded as they are
+        consumed, so callers that aggregate never hold the full result.
+    """
+
+    query_job = _start_query(sql)
+    return query_job.result().to_arrow_iterable(bqstorage_client=_bqstorage_client())
+
+def _start_query(sql: str) -> bigquery.QueryJob:
     if not isinstance(sql, str) or not sql.strip(): # Validate input SQL
         raise ValueError("SQL query must be a non-empty string.") # Raise error for invalid input
 
-    client = bigquery.Client() # connect to Google BigQuery using default credentials
+    client = _bq_client() # connect to Google BigQuery using default credentials (cached)
     
     print("Running SQL at:", datetime.utcnow().isoformat()) # Log the time the query is run
     print(sql)  # Log the SQL query being executed
 
-    query_job = client.query(sql) # send the query to BigQuery
-    df = query_job.to_dataframe() # convert the results to a pandas DataFrame
-
-    return df
+    return client.query(sql) # send the query to BigQuery
 
 # Manual sanity test
 if __name__ == "__main__":
@@ -8,33 +8,97 @@ DATA_DIR = PROJECT_ROOT / "data"
 CSV_PATH = DATA_DIR / "yellow_tripdata_sample.csv"
 DB_PATH = DATA_DIR / "taxi.db"
 
-print("📥 Loading CSV...")
-df = pd.read_csv(CSV_PATH)
-
-# Normalize column names (important for SQL + agents)
-df.columns = (
-    df.columns
-    .str.strip()
-    .str.lower()
-    .str.replace(" ", "_")
-)
-
-# Convert datetime columns if present
-for col in ["pickup_datetime", "dropoff_datetime"]:
-    if col in df.columns:
-        df[col] = pd.to_datetime(df[col], errors="coerce")
+# Rows per CSV chunk: peak memory is O(chunk), not O(file)
+CHUNK_SIZE = 250_000
+
+# Materialized time buckets (same formats as SQLite's DATE/STRFTIME) so
+# queries group on a stored column instead of re-parsing every timestamp
+BUCKET_FORMATS = {
+    "pickup_day": "%Y-%m-%d",
+    "pickup_week": "%Y-%W",
+    "pickup_month": "%Y-%m",
+}
+
+DATETIME_COLUMNS = ("pickup_datetime", "dropoff_datetime")
+
+# pandas dtype.kind -> SQLite column affinity
+SQLITE_TYPES = {"i": "INTEGER", "u": "INTEGER", "b": "INTEGER", "f": "REAL", "M": "TIMESTAMP"}
+
+
+def normalize_chunk(df: pd.DataFrame, columns: pd.Index) -> pd.DataFrame:
+    df.columns = columns
+
+    # Convert datetime columns if present; an explicit format keeps pandas on
+    # its C parser instead of inferring (and falling back to dateutil) per column
+    dt_cols = [c for c in DATETIME_COLUMNS if c in df.columns]
+    if dt_cols:
+        df[dt_cols] = df[dt_cols].apply(pd.to_datetime, format="ISO8601", errors="coerce")
+
+    if "pickup_datetime" in df.columns:
+        for bucket, fmt in BUCKET_FORMATS.items():
+            df[bucket] = df["pickup_datetime"].dt.strftime(fmt)
+    return df
+
+
+def chunk_rows(df: pd.DataFrame):
+    # Store datetimes as 'YYYY-MM-DD HH:MM:SS' text so range filters compare lexically
+    for name, dtype in df.dtypes.items():
+        if dtype.kind == "M":
+            df[name] = df[name].dt.strftime("%Y-%m-%d %H:%M:%S")
+    return df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+
+
+print("📥 Streaming CSV...")
+reader = pd.read_csv(CSV_PATH, chunksize=CHUNK_SIZE)
 
 print("🗄️ Creating SQLite database...")
 conn = sqlite3.connect(DB_PATH)
+conn.execute("PRAGMA journal_mode=WAL")
+conn.execute("PRAGMA synchronous=NORMAL")
+conn.execute("PRAGMA cache_size=-131072")
+conn.execute("PRAGMA temp_store=MEMORY")
+
+columns = None
+insert_sql = None
+total = 0
+
+for chunk in reader:
+    if columns is None:
+        # Normalize column names once (important for SQL + agents)
+        columns = (
+            chunk.columns
+            .str.strip()
+            .str.lower()
+            .str.replace(" ", "_", regex=False)
+        )
+        chunk = normalize_chunk(chunk, columns)
+
+        # Build the schema once from the first chunk's dtypes
+        columns_sql = ", ".join(
+            f'"{name}" {SQLITE_TYPES.get(dtype.kind, "TEXT")}' for name, dtype in chunk.dtypes.items()
+        )
+        conn.execute("DROP TABLE IF EXISTS taxi_trips")
+        conn.execute(f"CREATE TABLE taxi_trips ({columns_sql})")
+        insert_sql = f"INSERT INTO taxi_trips VALUES ({', '.join('?' * len(chunk.columns))})"
+    else:
+        chunk = normalize_chunk(chunk, columns)
+
+    # One transaction + one prepared INSERT per chunk
+    with conn:
+        conn.executemany(insert_sql, chunk_rows(chunk))
+    total += len(chunk)
+    print(f"   ... {total:,} rows")
 
-df.to_sql(
-    "taxi_trips",
-    conn,
-    if_exists="replace",
-    index=False
-)
+# Index after the bulk load (cheaper than maintaining it per insert) so
+# build_sql's pickup_datetime range filters become index range scans
+if columns is not None and "pickup_datetime" in columns:
+    print("🔎 Indexing pickup_datetime...")
+    with conn:
+        conn.execute("CREATE INDEX idx_taxi_trips_pickup ON taxi_trips(pickup_datetime)")
+        for bucket in BUCKET_FORMATS:
+            conn.execute(f"CREATE INDEX idx_taxi_trips_{bucket} ON taxi_trips({bucket})")
 
 conn.close()
 
 print("✅ SQLite DB created:", DB_PATH)
-print("Rows loaded:", len(df))
+print("Rows loaded:", total)
@@ -21,17 +21,28 @@ Features:
 import os
 import json
 import re
+from collections import OrderedDict
+from functools import cached_property, lru_cache
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Tuple, Optional
-try:
-    from dotenv import load_dotenv
-except Exception:
-    load_dotenv = None
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple, Optional
+
+if TYPE_CHECKING:
+    from symbiote_lite.semcache import SemanticCache
+
 ROOT = Path(__file__).resolve().parents[1]
-if load_dotenv is not None:
-    load_dotenv(ROOT / ".env")
-from .analysis import execute_sql_query
+if os.getenv("SYMBIOTE_SKIP_DOTENV") != "1":
+    try:
+        from dotenv import load_dotenv
+    except Exception:
+        load_dotenv = None
+    if load_dotenv is not None:
+        load_dotenv(ROOT / ".env")
+def execute_sql_query(sql: str):
+    # Deferred: .analysis pulls in pandas, which help/reset-only sessions never need.
+    global execute_sql_query
+    from .analysis import execute_sql_query
+    return execute_sql_query(sql)
 # =============================================================================
 # Dataset constraints
 # =============================================================================
@@ -57,6 +68,7 @@ def reset_session() -> Dict[str, Any]:
         "_last_sql": None,
         "_last_df": None,
         "_last_df_rows": 0,
+        "_last_df_cols_lower": frozenset(),
         "_last_user_question": None,
         "_postprocess": None,
     }
@@ -71,7 +83,15 @@ REQUIRED_SLOTS = {
     "tip_trend": ["start_date", "end_date", "granularity", "metric"],
     "sample_rows": ["start_date", "end_date"],
 }
-SUPPORTED_INTENTS = set(REQUIRED_SLOTS)
+SUPPORTED_INTENTS = frozenset(REQUIRED_SLOTS)
+# Plan "Task" line per intent; {agg} is filled from the metric for trends
+_TASK_LABELS = {
+    "trip_frequency": "Count trips over time",
+    "vendor_inactivity": "Rank vendors by trip count (lowest = most inactive)",
+    "fare_trend": "{agg} fares over time",
+    "tip_trend": "{agg} tips over time",
+    "sample_rows": "Show a safe sample of raw trip rows",
+}
 # =============================================================================
 # UX copy
 # =============================================================================
@@ -96,6 +116,16 @@ Commands:
 - exit  → quit
 """.strip()
 HELP_TEXT = INTRO
+# The INTRO examples, normalized. They are already clear analyst questions,
+# so semantic_rewrite passes them through without an LLM call.
+_EXAMPLE_PROMPTS = frozenset((
+    "show trips from 2022-01-01 to 2022-02-01 by day",
+    "were we busier in january vs february 2022?",
+    "how did fares change in summer 2022 by week (avg)",
+    "show total tips in q2 2022 by month",
+    "which vendors were inactive in november 2022?",
+))
+_EXIT_COMMANDS = frozenset(("exit", "quit", "bye", "q"))
 # =============================================================================
 # OpenAI integration
 # =============================================================================
@@ -103,16 +133,23 @@ def _openai_client() -> Optional[Any]:
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         return None
+    return _shared_openai_client(api_key)
+@lru_cache(maxsize=1)
+def _shared_openai_client(api_key: str) -> Optional[Any]:
     try:
         from openai import OpenAI
-        return OpenAI()
+        return OpenAI(api_key=api_key)
     except Exception:
         return None
 def _openai_model_name() -> str:
     return os.getenv("SYMBIOTE_MODEL", "gpt-4")
+def _openai_embedding_model_name() -> str:
+    return os.getenv("SYMBIOTE_EMBED_MODEL", "text-embedding-3-small")
 class _OpenAIModelShim:
     def __init__(self, client: Any):
         self._client = client
+        # None until the first embeddings call: False stops retrying a dead endpoint
+        self._use_embed: Optional[bool] = None
     class _Resp:
         def __init__(self, text: str):
             self.text = text
@@ -135,6 +172,22 @@ class _OpenAIModelShim:
                 return self._Resp(resp.choices[0].message.content or "")
             except Exception:
                 return self._Resp("")
+    def embed(self, text: str) -> Optional[list]:
+        if self._use_embed is False:
+            return None
+        try:
+            resp = self._client.embeddings.create(
+                model=_openai_embedding_model_name(),
+                input=text,
+            )
+        except Exception:
+            # An endpoint or model that fails on the first call (proxy without
+            # /embeddings, model not on the account) is not retried every turn
+            if self._use_embed is None:
+                self._use_embed = False
+            return None
+        self._use_embed = True
+        return resp.data[0].embedding
 def configure_chatgpt_model() -> Optional[Any]:
     client = _openai_client()
     if client is None:
@@ -160,52 +213,55 @@ Return JSON only.
 # =============================================================================
 # SECURITY: SQL injection detection
 # =============================================================================
-SQL_INJECTION_PATTERNS = [
+SQL_INJECTION_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
     r";\s*drop\s+", r";\s*delete\s+", r";\s*insert\s+", r";\s*update\s+",
     r";\s*alter\s+", r";\s*create\s+", r";\s*truncate\s+", r"--\s*$",
     r"'\s*;\s*", r"'\s*or\s+['\"1]", r"'\s*and\s+", r"union\s+select",
     r"exec\s*\(", r"execute\s*\(", r"xp_\w+", r"sp_\w+",
     r"0x[0-9a-f]+", r"char\s*\(", r"concat\s*\(",
-]
+))
 def detect_sql_injection(user_input: str) -> bool:
     """Detect potential SQL injection attempts."""
     t = user_input.lower()
     for pattern in SQL_INJECTION_PATTERNS:
-        if re.search(pattern, t, re.IGNORECASE):
+        if pattern.search(t):
             return True
     return False
 # =============================================================================
 # UNSUPPORTED QUERY PATTERNS
 # =============================================================================
 UNSUPPORTED_PATTERNS = [
-    (r"\b(weekend|weekday|saturday|sunday|weekends|weekdays)\s.*(busy|busier|more|less|compar|vs|than)", 
+    (re.compile(r"\b(weekend|weekday|saturday|sunday|weekends|weekdays)\s.*(busy|busier|more|less|compar|vs|than)"),
      "⚠️  Weekend vs weekday breakdown isn't supported yet.\nI can show you daily data so you can see patterns, or try weekly/monthly aggregation."),
-    (r"\b(hour|hourly|morning|evening|afternoon|night|midnight|noon)\b",
+    (re.compile(r"\b(hour|hourly|morning|evening|afternoon|night|midnight|noon)\b"),
      "⚠️  Hourly breakdown isn't supported yet.\nTry: daily, weekly, or monthly granularity instead."),
-    (r"\b(location|borough|zone|pickup.?location|dropoff.?location|manhattan|brooklyn|queens|bronx|staten)\b",
+    (re.compile(r"\b(location|borough|zone|pickup.?location|dropoff.?location|manhattan|brooklyn|queens|bronx|staten)\b"),
      "⚠️  Location-based analysis isn't supported yet.\nI can analyze trips, fares, tips, and vendors over time."),
-    (r"\b(driver|drivers|driver.?id)\b",
+    (re.compile(r"\b(driver|drivers|driver.?id)\b"),
      "⚠️  Driver-level analysis isn't available.\nI can show vendor (company) level data instead."),
-    (r"\b(passenger|passengers|rider|riders)\b",
+    (re.compile(r"\b(passenger|passengers|rider|riders)\b"),
      "⚠️  Passenger-level analysis isn't available.\nI can analyze trip counts, fares, and tips over time."),
-    (r"\b(distance|mile|miles|km|kilometer)\b",
+    (re.compile(r"\b(distance|mile|miles|km|kilometer)\b"),
      "⚠️  Distance-based analysis isn't supported yet.\nTry: fare trends or trip counts instead."),
-    (r"\b(payment|cash|card|credit|debit)\b",
+    (re.compile(r"\b(payment|cash|card|credit|debit)\b"),
      "⚠️  Payment type breakdown isn't supported yet.\nI can analyze total fares, tips, and trip counts."),
 ]
 def detect_unsupported_query(user_input: str) -> Optional[str]:
     """Return explanation if query asks for unsupported feature."""
     t = user_input.lower()
     for pattern, explanation in UNSUPPORTED_PATTERNS:
-        if re.search(pattern, t):
+        if pattern.search(t):
             return explanation
     return None
 # =============================================================================
 # MULTI-TOPIC DETECTION
 # =============================================================================
-def detect_multi_topic(user_input: str) -> Optional[List[str]]:
-    """Detect if user asked for multiple topics at once."""
-    t = user_input.lower()
+def detect_multi_topic(user_input: str, lowered: Optional[str] = None) -> Optional[List[str]]:
+    """Detect if user asked for multiple topics at once.
+
+    Pass `lowered` (user_input.lower()) when the caller already has it.
+    """
+    t = user_input.lower() if lowered is None else lowered
     topics_found = []
     
     # Only trigger if explicit conjunction
@@ -226,64 +282,134 @@ def detect_multi_topic(user_input: str) -> Optional[List[str]]:
 # =============================================================================
 # Routing
 # =============================================================================
+_TOPIC_KEYWORDS = (
+    ("vendor_inactivity", ("vendor",)),
+    ("tip_trend", ("tip",)),
+    ("fare_trend", ("fare", "price", "expensive", "money", "revenue", "cost")),
+    ("trip_frequency", ("trip", "ride", "busy", "busier", "frequency", "activity", "volume")),
+)
+
+_REVISE_WORDS = ("use ", "instead", "revise", "change", "update")
+_TOPIC_WORDS = ("trip", "fare", "tip", "vendor")
+_OUT_OF_SCOPE_WORDS = ("churn", "customer", "cohort", "retention", "subscription")
+_HELP_WORDS = ("help", "what can i ask", "what can i do", "who are you")
+_SAMPLE_WORDS = ("sample", "limit")
+_ROW_WORDS = ("row", "records")
+_BEST_DAY_WORDS = ("travel", "go", "ride")
+_WHOLE_PERIOD_WORDS = ("taxi activity", "trip trends", "breakdown", "spot trends",
+                       "whole year", "entire year", "all of 2022", "full year")
+_OTHER_YEAR_RE = re.compile(r"\b20(1\d|2[0134-9])\b")
+_CODE_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$", re.I)
+def _contains_any(t: str, words: Tuple[str, ...]) -> bool:
+    # Plain loop: cheaper than any() over a generator for these short tuples
+    for w in words:
+        if w in t:
+            return True
+    return False
 def _heuristic_route(user_input: str) -> Dict[str, Any]:
     t = user_input.lower()
     
     # If the user provides valid 2022 dates but forgets the keyword (common follow-up like "use ... instead"),
     # keep the conversation going by assuming a trip count query.
-    if "2022-" in t and any(w in t for w in ["use ", "instead", "revise", "change", "update"]) and ("trip" not in t and "fare" not in t and "tip" not in t and "vendor" not in t):
+    if "2022-" in t and _contains_any(t, _REVISE_WORDS) and not _contains_any(t, _TOPIC_WORDS):
         return {"intent": "trip_frequency"}
 
     # Out of scope
-    if any(k in t for k in ["churn", "customer", "cohort", "retention", "subscription"]):
+    if _contains_any(t, _OUT_OF_SCOPE_WORDS):
         return {"intent": "unknown", "dataset_match": False}
-    if re.search(r"\b20(1\d|2[0134-9])\b", t) and "2022" not in t:
+    if _OTHER_YEAR_RE.search(t) and "2022" not in t:
         return {"intent": "unknown", "dataset_match": False}
     
     # Help/meta
-    if any(k in t for k in ["help", "what can i ask", "what can i do", "who are you"]):
+    if _contains_any(t, _HELP_WORDS):
         return {"intent": "unknown", "dataset_match": True}
     # Follow-ups / UX commands (sample, compare, explain)
-    if any(k in t for k in ["sample", "show me a sample", "limit"]) and any(k in t for k in ["row", "rows", "records"]):
+    if _contains_any(t, _SAMPLE_WORDS) and _contains_any(t, _ROW_WORDS):
         return {"intent": "sample_rows", "dataset_match": True}
-    if "best day" in t and any(k in t for k in ["travel", "go", "ride"]):
+    if "best day" in t and _contains_any(t, _BEST_DAY_WORDS):
         # We'll treat this as a fare-based question by default
         return {"intent": "fare_trend", "dataset_match": True}
-    if any(k in t for k in ["compare", "versus", "vs"]):
-        # Likely still a supported topic; fall through to topic detection below
-        pass
+    # compare/versus/vs: still a supported topic; fall through to topic detection
     
     # Trip-related
-    if any(k in t for k in ["taxi activity", "trip trends", "breakdown", "spot trends", 
-                            "whole year", "entire year", "all of 2022", "full year"]):
+    if _contains_any(t, _WHOLE_PERIOD_WORDS):
         return {"intent": "trip_frequency", "dataset_match": True}
     
-    # Specific intents
-    if "vendor" in t:
-        return {"intent": "vendor_inactivity", "dataset_match": True}
-    if "tip" in t and "strip" not in t:  # Avoid false positive
-        return {"intent": "tip_trend", "dataset_match": True}
-    if any(k in t for k in ["fare", "price", "expensive", "money", "revenue", "cost"]):
-        return {"intent": "fare_trend", "dataset_match": True}
-    if any(k in t for k in ["trip", "trips", "ride", "rides", "busy", "busier", 
-                            "frequency", "activity", "volume"]):
-        return {"intent": "trip_frequency", "dataset_match": True}
+    # Specific intents (priority order); a single matching family is
+    # unambiguous enough that ask_gemini_router skips the LLM
+    topics = [
+        intent for intent, keywords in _TOPIC_KEYWORDS
+        if _contains_any(t, keywords) and not (intent == "tip_trend" and "strip" in t)  # Avoid false positive
+    ]
+    if topics:
+        return {
+            "intent": topics[0],
+            "dataset_match": True,
+            "confidence": "high" if len(topics) == 1 else "low",
+        }
     
     return {"intent": "unknown", "dataset_match": True}
+# Paraphrases of an already-routed question reuse its route instead of
+# another LLM call. Only routes are cached: a rewrite carries the user's
+# exact dates, which a similar-sounding question must not inherit. Caches
+# are split by the years mentioned so "2022" and "2019" never share a route.
+_route_semcaches: Dict[Tuple[str, ...], SemanticCache] = {}
+# Exact repeats (modulo case/whitespace) skip even the embedding call
+_ROUTE_CACHE_SIZE = 256
+_route_cache: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+def _route_cache_key(user_input: str) -> Tuple[str, str]:
+    return (_openai_model_name(), " ".join(user_input.lower().split()))
+def _route_cache_put(key: Tuple[str, str], data: Dict[str, Any]) -> None:
+    _route_cache[key] = dict(data)
+    _route_cache.move_to_end(key)
+    if len(_route_cache) > _ROUTE_CACHE_SIZE:
+        _route_cache.popitem(last=False)
+def clear_route_caches() -> None:
+    _route_cache.clear()
+    _route_semcaches.clear()
+def _route_semcache(user_input: str) -> SemanticCache:
+    # Deferred like .analysis: semcache pulls in numpy (and symbiote_lite
+    # pandas), which only LLM-routed sessions need.
+    from symbiote_lite.semcache import SemanticCache
+    scope = tuple(sorted(set(ANY_YEAR_RE.findall(user_input))))
+    cache = _route_semcaches.get(scope)
+    if cache is None:
+        cache = _route_semcaches[scope] = SemanticCache()
+    return cache
+def _embed(user_input: str) -> Optional[list]:
+    embed = getattr(MODEL, "embed", None)
+    if embed is None:
+        return None
+    return embed(" ".join(user_input.lower().split()))
 def ask_gemini_router(user_input: str) -> Dict[str, Any]:
-    if MODEL is None:
-        return _heuristic_route(user_input)
+    heuristic = _heuristic_route(user_input)
+    if MODEL is None or heuristic.get("confidence") == "high":
+        return heuristic
+    key = _route_cache_key(user_input)
+    hit = _route_cache.get(key)
+    if hit is not None:
+        _route_cache.move_to_end(key)
+        return dict(hit)
+    vec = _embed(user_input)
+    if vec is not None:
+        similar = _route_semcache(user_input).lookup(vec)
+        if similar is not None:
+            _route_cache_put(key, similar)
+            return similar
     try:
         prompt = ROUTER_SYSTEM_PROMPT + "\n\nUser request:\n" + user_input
         response = MODEL.generate_content(prompt)
         text = (response.text or "").strip()
-        text = re.sub(r"^```(?:json)?\s*|\s*```$", "", text, flags=re.I)
+        text = _CODE_FENCE_RE.sub("", text)
         data = json.loads(text)
         if not isinstance(data, dict):
-            return _heuristic_route(user_input)
+            return heuristic
+        _route_cache_put(key, data)
+        if vec is not None:
+            _route_semcache(user_input).add(vec, data)
         return data
     except Exception:
-        return _heuristic_route(user_input)
+        return heuristic
 def semantic_rewrite(user_input: str) -> Dict[str, Any]:
     def _fallback():
         return {
@@ -292,13 +418,13 @@ def semantic_rewrite(user_input: str) -> Dict[str, Any]:
             "granularity_hint": None,
             "metric_hint": None,
         }
-    if MODEL is None:
+    if MODEL is None or " ".join(user_input.lower().split()) in _EXAMPLE_PROMPTS:
         return _fallback()
     try:
         prompt = REWRITE_SYSTEM_PROMPT + "\n\nUser message:\n" + user_input
         resp = MODEL.generate_content(prompt)
         text = (resp.text or "").strip()
-        text = re.sub(r"^```(?:json)?\s*|\s*```$", "", text, flags=re.I)
+        text = _CODE_FENCE_RE.sub("", text)
         data = json.loads(text)
         if not isinstance(data, dict) or "rewritten" not in data:
             return _fallback()
@@ -362,8 +488,16 @@ def normalize_metric(value: str) -> str:
 # =============================================================================
 # Date parsing and validation
 # =============================================================================
+# Pure and re-run on the same few strings during slot filling; datetimes
+# are immutable, so cached results can be shared safely
+@lru_cache(maxsize=256)
 def _parse_date(s: str) -> datetime:
     s = s.strip().replace("/", "-")
+    # Fast path for canonical YYYY-MM-DD; anything else goes through strptime
+    if len(s) == 10 and s[4] == "-" and s[7] == "-":
+        digits = s[:4] + s[5:7] + s[8:]
+        if digits.isascii() and digits.isdigit():
+            return datetime(int(s[:4]), int(s[5:7]), int(s[8:]))
     return datetime.strptime(s, "%Y-%m-%d")
 def validate_date(date_str: str) -> None:
     try:
@@ -381,6 +515,7 @@ def validate_range(start: str, end: str) -> None:
     if (e - s).days == 1:
         print(f"\n💡 Note: This is a single-day range ({s.strftime('%Y-%m-%d')} only).")
         print("   Remember: end_date is exclusive.\n")
+@lru_cache(maxsize=256)
 def _date_to_str(d: Any) -> str:
     if isinstance(d, datetime):
         return d.strftime("%Y-%m-%d")
@@ -391,7 +526,11 @@ def _date_to_str(d: Any) -> str:
 # Date extraction with typo tolerance
 # =============================================================================
 ISO_DATE_RE = re.compile(r"\b(\d{4})[-/](\d{2})[-/](\d{2})\b")
+ISO_2022_RE = re.compile(r"\b2022-\d{2}-\d{2}\b")
 Q_RE = re.compile(r"\bq([1-4])\b", re.IGNORECASE)
+ANY_YEAR_RE = re.compile(r"\b20\d{2}\b")
+NON_DATASET_YEAR_RE = re.compile(r"\b20(?:1\d|2[013-9])\b")
+SMALL_NUM_RE = re.compile(r"\b(\d{1,4})\b")
 SEASON_MAP = {
     "spring": (3, 6), "summer": (6, 9), "fall": (9, 12), 
     "autumn": (9, 12), "winter": (1, 3),
@@ -423,34 +562,21 @@ MONTH_MAP = {
     # December variations
     "dec": 12, "december": 12, "decmber": 12, "dicember": 12,
 }
+# Every spelling in MONTH_MAP (typos included) shares its first three letters
+# with the month it maps to, so a 3-letter prefix identifies the month and one
+# alternation over the prefixes finds every month word in a single pass.
+_MONTH_PREFIXES = {key[:3]: val for key, val in MONTH_MAP.items()}
+MONTH_WORD_RE = re.compile(r"\b(" + "|".join(sorted(_MONTH_PREFIXES)) + r")[a-z]{0,9}\b")
 def _get_month_num(word: str) -> int:
     """Get month number from word, with typo tolerance."""
     w = word.lower().strip()
-    
-    # Direct match
-    if w in MONTH_MAP:
-        return MONTH_MAP[w]
-    
-    # Try first 3 letters
-    if len(w) >= 3:
-        prefix = w[:3]
-        if prefix in MONTH_MAP:
-            return MONTH_MAP[prefix]
-    
-    # Fuzzy: check if starts similarly to any month
-    for key, val in MONTH_MAP.items():
-        if len(key) >= 3 and len(w) >= 3:
-            if key[:3] == w[:3]:
-                return val
-    
-    return 0
+    return _MONTH_PREFIXES.get(w[:3], 0) if len(w) >= 3 else 0
 def _find_months_in_text(text: str) -> List[int]:
     """Find all month references in text, including typos."""
     found = []
-    words = re.findall(r'\b[a-zA-Z]{3,12}\b', text.lower())
-    for word in words:
-        month_num = _get_month_num(word)
-        if month_num > 0 and month_num not in found:
+    for prefix in MONTH_WORD_RE.findall(text.lower()):
+        month_num = _MONTH_PREFIXES[prefix]
+        if month_num not in found:
             found.append(month_num)
     return found
 def extract_dates(text: str) -> List[datetime]:
@@ -473,7 +599,7 @@ def extract_dates(text: str) -> List[datetime]:
     # keep a flag so we can explain that we auto-corrected it later.
     try:
         if found_iso:
-            ordered = re.findall(r"\b2022-\d{2}-\d{2}\b", text)
+            ordered = ISO_2022_RE.findall(text)
             if len(ordered) >= 2:
                 d0 = datetime.strptime(ordered[0], "%Y-%m-%d")
                 d1 = datetime.strptime(ordered[1], "%Y-%m-%d")
@@ -506,12 +632,12 @@ def extract_dates(text: str) -> List[datetime]:
     
     # 3. Year with breakdown context
     if "year" in t and any(w in t for w in ["monthly", "month", "breakdown", "trends", "by"]):
-        if "2022" in t or not re.search(r"\b20\d{2}\b", t):
+        if "2022" in t or not ANY_YEAR_RE.search(t):
             return [datetime(2022, 1, 1), datetime(2023, 1, 1)]
     
     # 4. Quarters
     qm = Q_RE.search(t)
-    if qm and ("2022" in t or not re.search(r"\b20\d{2}\b", t)):
+    if qm and ("2022" in t or not ANY_YEAR_RE.search(t)):
         q = int(qm.group(1))
         start_month = (q - 1) * 3 + 1
         end_month = start_month + 3
@@ -522,7 +648,7 @@ def extract_dates(text: str) -> List[datetime]:
     # 5. Seasons
     for season, (m1, m2) in SEASON_MAP.items():
         if season in t:
-            if re.search(r"\b20(?:1\d|2[013-9])\b", t):  # Different year mentioned
+            if NON_DATASET_YEAR_RE.search(t):  # Different year mentioned
                 print(f"\n💡 I see '{season}' — did you mean {season} 2022?")
                 return []
             return [datetime(2022, m1, 1), datetime(2022, m2, 1)]
@@ -534,7 +660,7 @@ def extract_dates(text: str) -> List[datetime]:
         comparison_words = [" vs ", " versus ", " compared to ", " compare ", " or ", " - "]
         is_comparison = any(w in t for w in comparison_words)
         
-        if "2022" in t or not re.search(r"\b20\d{2}\b", t):
+        if "2022" in t or not ANY_YEAR_RE.search(t):
             if len(found_months) == 1:
                 m = found_months[0]
                 start = datetime(2022, m, 1)
@@ -576,26 +702,41 @@ def extract_slots_from_text(user_input: str) -> None:
 # =============================================================================
 # SQL safety
 # =============================================================================
+_DANGEROUS_RE = re.compile(
+    r"\b(?:insert|update|delete|drop|alter|create|truncate|grant|revoke|exec|execute)\b"
+)
 def safe_select_only(sql: str) -> str:
     """Ensure SQL is SELECT-only."""
     low = sql.lower().strip()
     if not (low.startswith("select") or low.startswith("with")):
         raise ValueError("Only SELECT queries are allowed.")
-    dangerous = ["insert", "update", "delete", "drop", "alter", "create", 
-                 "truncate", "grant", "revoke", "exec", "execute"]
-    for kw in dangerous:
-        if re.search(rf"\b{kw}\b", low):
-            raise ValueError("Unsafe SQL detected.")
+    if _DANGEROUS_RE.search(low):
+        raise ValueError("Unsafe SQL detected.")
     return sql
 # =============================================================================
 # SQL builders
 # =============================================================================
+_BUCKET_COLUMNS = frozenset(("pickup_day", "pickup_week", "pickup_month"))
+def _has_bucket_columns() -> bool:
+    from .analysis import table_columns
+    try:
+        return _BUCKET_COLUMNS <= table_columns("taxi_trips")
+    except Exception:
+        return False
 def time_bucket(granularity: str) -> Tuple[str, str]:
+    # Bucket columns are materialized at load time by create_sqlite_db.py; a
+    # taxi.db built before they existed falls back to parsing pickup_datetime
+    if not _has_bucket_columns():
+        if granularity == "daily":
+            return "DATE(pickup_datetime)", "day"
+        if granularity == "weekly":
+            return "STRFTIME('%Y-%W', pickup_datetime)", "week"
+        return "STRFTIME('%Y-%m', pickup_datetime)", "month"
     if granularity == "daily":
-        return "DATE(pickup_datetime)", "day"
+        return "pickup_day", "day"
     if granularity == "weekly":
-        return "STRFTIME('%Y-%W', pickup_datetime)", "week"
-    return "STRFTIME('%Y-%m', pickup_datetime)", "month"
+        return "pickup_week", "week"
+    return "pickup_month", "month"
 def build_sql(intent: str) -> str:
     sd = _date_to_str(session_state["start_date"])
     ed = _date_to_str(session_state["end_date"])
@@ -653,11 +794,15 @@ def recommend_granularity(start: datetime, end: datetime) -> str:
         return "weekly"
     return "monthly"
 def estimate_rows(intent: str, start: datetime, end: datetime, granularity: Optional[str]) -> str:
-    if intent == "vendor_inactivity":
-        return "~3-5"
     if intent == "sample_rows":
+        # Depends on the session limit, so it stays outside the cache
         lim = session_state.get("limit") or 100
         return f"~{lim}"
+    return _estimate_rows(intent, start, end, granularity)
+@lru_cache(maxsize=64)
+def _estimate_rows(intent: str, start: datetime, end: datetime, granularity: Optional[str]) -> str:
+    if intent == "vendor_inactivity":
+        return "~3-5"
     if not granularity:
         return "unknown"
     days = (end - start).days
@@ -666,37 +811,47 @@ def estimate_rows(intent: str, start: datetime, end: datetime, granularity: Opti
     elif granularity == "weekly":
         return f"~{max(1, days // 7)}"
     return f"~{max(1, days // 30)}"
+_EXPLAIN_STATIC = {
+    "trip_frequency": "Count how many taxi trips occurred in each time bucket",
+    "vendor_inactivity": "Rank taxi vendors by total trips (fewest first = most inactive)",
+    "sample_rows": "Show raw trip rows (limited) for quick inspection",
+}
+_EXPLAIN_METRIC_COLUMN = {"fare_trend": "fare", "tip_trend": "tip"}
 def explain_sql(intent: str) -> str:
-    metric = session_state.get("metric")
-    explanations = {
-        "trip_frequency": "Count how many taxi trips occurred in each time bucket",
-        "vendor_inactivity": "Rank taxi vendors by total trips (fewest first = most inactive)",
-        "fare_trend": f"Calculate {'total sum' if metric=='total' else 'average'} of fare amounts per time bucket",
-        "tip_trend": f"Calculate {'total sum' if metric=='total' else 'average'} of tip amounts per time bucket",
-        "sample_rows": "Show raw trip rows (limited) for quick inspection",
-    }
-    return explanations.get(intent, "Run analysis query")
-def get_follow_up_suggestions(intent: str) -> List[str]:
-    suggestions = {
-        "trip_frequency": [
-            "Compare this to another period",
-            "See which vendors drove these trips",
-            "Check fare trends for the same period",
-        ],
-        "vendor_inactivity": [
-            "See trip trends for the most inactive vendor",
-            "Compare vendor activity across quarters",
-        ],
-        "fare_trend": [
-            "Compare to trip frequency (correlation?)",
-            "See tip trends for the same period",
-        ],
-        "tip_trend": [
-            "Compare to fare trends (tip percentage)",
-            "See which vendors have highest tips",
-        ],
-    }
-    return suggestions.get(intent, [])
+    col = _EXPLAIN_METRIC_COLUMN.get(intent)
+    if col is None:
+        return _EXPLAIN_STATIC.get(intent, "Run analysis query")
+    agg = "total sum" if session_state.get("metric") == "total" else "average"
+    return f"Calculate {agg} of {col} amounts per time bucket"
+# Each suggestion carries the follow-up actions it maps to, tried in order
+# by _handle_numbered_followup (see _FOLLOWUP_ACTIONS)
+_FOLLOW_UP_SUGGESTIONS: Dict[str, Tuple[Tuple[str, Tuple[str, ...]], ...]] = {
+    "trip_frequency": (
+        ("Compare this to another period", ("compare_period",)),
+        ("See which vendors drove these trips", ("see_vendors", "see_trips")),
+        ("Check fare trends for the same period", ("see_fares",)),
+    ),
+    "vendor_inactivity": (
+        ("See trip trends for the most inactive vendor", ("see_trips",)),
+        ("Compare vendor activity across quarters", ("compare_vendors",)),
+    ),
+    "fare_trend": (
+        ("Compare to trip frequency (correlation?)", ("see_trips",)),
+        ("See tip trends for the same period", ("see_tips",)),
+    ),
+    "tip_trend": (
+        ("Compare to fare trends (tip percentage)", ("see_fares",)),
+        ("See which vendors have highest tips", ("see_vendors", "see_tips")),
+    ),
+}
+_SUGGESTION_LABELS = {
+    intent: tuple(label for label, _ in items) for intent, items in _FOLLOW_UP_SUGGESTIONS.items()
+}
+_SUGGESTION_ACTIONS = {
+    label: actions for items in _FOLLOW_UP_SUGGESTIONS.values() for label, actions in items
+}
+def get_follow_up_suggestions(intent: str) -> Tuple[str, ...]:
+    return _SUGGESTION_LABELS.get(intent, ())
 def suggest_followup(intent: str) -> None:
     items = get_follow_up_suggestions(intent)
     session_state["_last_suggestions"] = items
@@ -768,6 +923,8 @@ def _prompt_choice(prompt: str, choices: List[str], default: Optional[str] = Non
         if raw_first in choices:
             return raw_first
         print(f"  ⚠️  Choose one: {', '.join(choices)}.")
+_YES = frozenset({"yes", "y", "approve", "run", "ok", "okay", "yeah", "yep", "sure"})
+_NO = frozenset({"no", "n", "deny", "cancel", "stop", "abort", "nope"})
 def _prompt_yes_no(prompt: str) -> bool:
     """Yes/No prompt with friendly synonyms.
     Accepts: yes/y/approve/run, no/n/deny/cancel/stop.
@@ -778,9 +935,9 @@ def _prompt_yes_no(prompt: str) -> bool:
         except (EOFError, KeyboardInterrupt):
             print("\n")
             raise
-        if raw in ("yes", "y", "approve", "run", "ok", "okay"):
+        if raw in _YES:
             return True
-        if raw in ("no", "n", "deny", "cancel", "stop", "abort", "nope"):
+        if raw in _NO:
             return False
         print("  ⚠️  Please type yes or no (or 'deny' to cancel).")
 def _prompt_date(field: str, example: str) -> datetime:
@@ -801,30 +958,61 @@ def _prompt_date(field: str, example: str) -> datetime:
 # Meta/guidance detection
 # =============================================================================
 SUMMARY_RE = re.compile(r"\b(summar|insight|overview|what.?happened|tell me about)\b", re.I)
+_SINGLE_DAY_RE = re.compile(r"\b(on|for)\s+\d{4}-\d{2}-\d{2}\b")
+_TOPIC_STRIP_RE = re.compile(r"\b(?:trip|trips|ride|rides|fare|fares|tip|tips|vendor|vendors)\b", re.I)
 HELPISH_RE = re.compile(r"\b(help|what can i|how can you|who are you|your name)\b", re.I)
-def _is_summaryish(text: str) -> bool:
-    return bool(SUMMARY_RE.search(text))
-def _has_specific_topic(text: str) -> bool:
-    t = text.lower()
-    return any(w in t for w in ["fare", "fares", "tip", "tips", "trip", "trips", "vendor", "vendors"])
-def _has_time_context(text: str) -> bool:
-    t = text.lower()
-    if any(s in t for s in SEASON_MAP.keys()):
-        return True
-    if Q_RE.search(t):
-        return True
-    if ISO_DATE_RE.search(t):
-        return True
-    if _find_months_in_text(t):
-        return True
-    return False
-def _needs_summary_wizard(text: str) -> bool:
-    t = text.lower()
-    if _is_summaryish(t) and _has_time_context(t) and not _has_specific_topic(t):
-        return True
-    if _is_summaryish(t) and not _has_specific_topic(t) and not _has_time_context(t):
-        return True
-    return False
+# Literal each SUMMARY_RE alternative starts with: no hint, no regex run
+_SUMMARY_HINTS = ("summar", "insight", "overview", "what", "tell me about")
+_SEASONS = tuple(SEASON_MAP)
+class _InputSignals:
+    """Facts about one lowercased message, each computed at most once.
+
+    The meta handler, vague-time check and summary wizard all ask overlapping
+    questions (months? time context? topic?) about the same text; this keeps
+    every scan to a single pass per turn.
+    """
+    def __init__(self, t_lower: str):
+        self.t = t_lower
+    @cached_property
+    def months(self) -> List[int]:
+        return _find_months_in_text(self.t)
+    @cached_property
+    def has_time_context(self) -> bool:
+        t = self.t
+        # Cheapest checks first; each regex only runs if its required literal is present
+        if _contains_any(t, _SEASONS):
+            return True
+        if "q" in t and Q_RE.search(t):
+            return True
+        if ("-" in t or "/" in t) and ISO_DATE_RE.search(t):
+            return True
+        return bool(self.months)
+    @cached_property
+    def has_specific_topic(self) -> bool:
+        return _contains_any(self.t, _TOPIC_WORDS)
+    @cached_property
+    def is_summary(self) -> bool:
+        return _contains_any(self.t, _SUMMARY_HINTS) and bool(SUMMARY_RE.search(self.t))
+def _signals(t_lower: str) -> _InputSignals:
+    # One entry per session: the helpers for the current turn share it
+    cached = session_state.get("_sig_cache")
+    if cached is not None and cached.t == t_lower:
+        return cached
+    sig = session_state["_sig_cache"] = _InputSignals(t_lower)
+    return sig
+# The predicates below take already-lowercased text (t_lower) from
+# _handle_meta_or_guidance, which lowercases the message once per turn.
+def _is_summaryish(t_lower: str) -> bool:
+    return _signals(t_lower).is_summary
+def _has_specific_topic(t_lower: str) -> bool:
+    return _signals(t_lower).has_specific_topic
+def _has_time_context(t_lower: str) -> bool:
+    return _signals(t_lower).has_time_context
+def _needs_summary_wizard(t_lower: str) -> bool:
+    # The wizard opens for summary-style asks without a topic, with or without
+    # a time period, so time context never changes the answer
+    sig = _signals(t_lower)
+    return sig.is_summary and not sig.has_specific_topic
 def _handle_summary_wizard() -> Optional[str]:
     print("\n🧾 Summary mode — I can summarize a period, but I need 2 things:")
     print("1) Topic: trips / fares / tips / vendors")
@@ -864,11 +1052,44 @@ def contextual_help(user_input: str) -> None:
 # =============================================================================
 # Numbered follow-up handling
 # =============================================================================
+def _followup_compare_period(last_intent, sd, ed, gran) -> Optional[str]:
+    print("\n📅 To compare periods, specify a new date range.")
+    print("Example: 'show trips in Q1 2022 by month'\n")
+    return ""
+def _followup_see_vendors(last_intent, sd, ed, gran) -> Optional[str]:
+    if last_intent == "trip_frequency" and sd and ed:
+        return f"show inactive vendors from {_date_to_str(sd)} to {_date_to_str(ed)}"
+    return None
+def _followup_see_fares(last_intent, sd, ed, gran) -> Optional[str]:
+    if sd and ed:
+        return f"show avg fares from {_date_to_str(sd)} to {_date_to_str(ed)} by {gran}"
+    return None
+def _followup_see_tips(last_intent, sd, ed, gran) -> Optional[str]:
+    if sd and ed:
+        return f"show avg tips from {_date_to_str(sd)} to {_date_to_str(ed)} by {gran}"
+    return None
+def _followup_see_trips(last_intent, sd, ed, gran) -> Optional[str]:
+    if last_intent == "vendor_inactivity" and sd and ed:
+        return f"show trips from {_date_to_str(sd)} to {_date_to_str(ed)} by monthly"
+    return None
+def _followup_compare_vendors(last_intent, sd, ed, gran) -> Optional[str]:
+    print("\n📊 To compare vendors across quarters, try:")
+    print("   'show inactive vendors in Q1 2022'\n")
+    return ""
+# Action tag -> handler; a handler returns None when it does not apply
+_FOLLOWUP_ACTIONS = {
+    "compare_period": _followup_compare_period,
+    "see_vendors": _followup_see_vendors,
+    "see_fares": _followup_see_fares,
+    "see_tips": _followup_see_tips,
+    "see_trips": _followup_see_trips,
+    "compare_vendors": _followup_compare_vendors,
+}
 def _handle_numbered_followup(num_str: str) -> Optional[str]:
-    try:
-        num = int(num_str)
-    except ValueError:
+    # isdigit() alone also accepts digits int() rejects (e.g. "²")
+    if not (num_str.isascii() and num_str.isdigit()):
         return None
+    num = int(num_str)
     
     suggestions = session_state.get("_last_suggestions", [])
     context = session_state.get("_last_query_context")
@@ -896,32 +1117,10 @@ def _handle_numbered_followup(num_str: str) -> Optional[str]:
     sd, ed = context.get("start_date"), context.get("end_date")
     gran = context.get("granularity", "monthly")
     
-    # Handle each suggestion type
-    if "Compare this to another period" in suggestion:
-        print("\n📅 To compare periods, specify a new date range.")
-        print("Example: 'show trips in Q1 2022 by month'\n")
-        return ""
-    
-    if "vendors" in suggestion.lower() and last_intent == "trip_frequency":
-        if sd and ed:
-            return f"show inactive vendors from {_date_to_str(sd)} to {_date_to_str(ed)}"
-    
-    if "fare" in suggestion.lower():
-        if sd and ed:
-            return f"show avg fares from {_date_to_str(sd)} to {_date_to_str(ed)} by {gran}"
-    
-    if "tip" in suggestion.lower():
-        if sd and ed:
-            return f"show avg tips from {_date_to_str(sd)} to {_date_to_str(ed)} by {gran}"
-    
-    if "trip" in suggestion.lower() and last_intent == "vendor_inactivity":
-        if sd and ed:
-            return f"show trips from {_date_to_str(sd)} to {_date_to_str(ed)} by monthly"
-    
-    if "Compare vendor" in suggestion:
-        print("\n📊 To compare vendors across quarters, try:")
-        print("   'show inactive vendors in Q1 2022'\n")
-        return ""
+    for action in _SUGGESTION_ACTIONS.get(suggestion, ()):
+        result = _FOLLOWUP_ACTIONS[action](last_intent, sd, ed, gran)
+        if result is not None:
+            return result
     
     print(f"\n💡 Selected: {suggestion}")
     print("Please rephrase this as a question.\n")
@@ -939,7 +1138,9 @@ def explain_last_result(style: str = "simple") -> None:
     intent = ctx.get("intent")
     # If intent context is missing, infer from the last dataframe columns for a better UX.
     if not intent:
-        cols = [c.lower() for c in getattr(df, "columns", [])]
+        cols = session_state.get("_last_df_cols_lower") or frozenset(
+            str(c).lower() for c in getattr(df, "columns", [])
+        )
         if "trips" in cols:
             intent = "trip_frequency"
         elif "vendor_id" in cols and "trips" in cols:
@@ -966,12 +1167,15 @@ def explain_last_result(style: str = "simple") -> None:
         if intent == "trip_frequency" and len(df.columns) >= 2:
             xcol, ycol = df.columns[0], df.columns[1]
             y = df[ycol]
+            # Positional argmin/argmax give both extremes and their rows
+            # without separate min()/max() passes or label-based .loc lookups
+            lo_i, hi_i = y.argmin(), y.argmax()
+            lo, hi = int(y.iat[lo_i]), int(y.iat[hi_i])
+            x = df[xcol]
             print(f"- Each row is one {gran or 'time'} bucket, and `{ycol}` is the number of trips in that bucket.")
-            print(f"- In this result, trips range from {int(y.min())} to {int(y.max())} per {xcol}.")
-            max_row = df.loc[y.idxmax()]
-            min_row = df.loc[y.idxmin()]
-            print(f"- Highest day: {max_row[xcol]} with {int(max_row[ycol])} trips.")
-            print(f"- Lowest day:  {min_row[xcol]} with {int(min_row[ycol])} trips.")
+            print(f"- In this result, trips range from {lo} to {hi} per {xcol}.")
+            print(f"- Highest day: {x.iat[hi_i]} with {hi} trips.")
+            print(f"- Lowest day:  {x.iat[lo_i]} with {lo} trips.")
             print("\nNext useful step: compare to another period (e.g., March vs April) to confirm it's truly 'low'.")
             print("Try: 'compare April to March 2022 by week'\n")
             return
@@ -999,64 +1203,73 @@ def explain_last_result(style: str = "simple") -> None:
 # =============================================================================
 # Vague time handling
 # =============================================================================
-def _is_vague_time_only(text: str) -> bool:
-    t = text.lower()
-    vague = ["last month", "this month", "yesterday", "today", "last week", 
-             "this week", "recently", "lately"]
-    return any(v in t for v in vague) and not _has_time_context(t)
-def _handle_vague_time_reference(user_input: str) -> Optional[str]:
-    t = user_input.lower()
-    if not _is_vague_time_only(t):
-        return None
-    
-    patterns = [
-        ("last month", "❓ 'Last month' is ambiguous for this 2022 dataset."),
-        ("this month", "❓ 'This month' is ambiguous for this 2022 dataset."),
-        ("yesterday", "❓ 'Yesterday' is ambiguous for this 2022 dataset."),
-        ("today", "❓ 'Today' is ambiguous for this 2022 dataset."),
-        ("last week", "❓ 'Last week' is ambiguous for this 2022 dataset."),
-        ("this week", "❓ 'This week' is ambiguous for this 2022 dataset."),
-        ("recently", "❓ 'Recently' is ambiguous for this 2022 dataset."),
-        ("lately", "❓ 'Lately' is ambiguous for this 2022 dataset."),
-    ]
-    
-    for pattern, msg in patterns:
-        if pattern in t:
-            print(f"\n{msg}")
-            print("Try: 'show trips in November 2022' or 'fares in Q4 2022'\n")
-            return ""
+_VAGUE_TIME_MSG = {
+    "last month": "❓ 'Last month' is ambiguous for this 2022 dataset.",
+    "this month": "❓ 'This month' is ambiguous for this 2022 dataset.",
+    "yesterday": "❓ 'Yesterday' is ambiguous for this 2022 dataset.",
+    "today": "❓ 'Today' is ambiguous for this 2022 dataset.",
+    "last week": "❓ 'Last week' is ambiguous for this 2022 dataset.",
+    "this week": "❓ 'This week' is ambiguous for this 2022 dataset.",
+    "recently": "❓ 'Recently' is ambiguous for this 2022 dataset.",
+    "lately": "❓ 'Lately' is ambiguous for this 2022 dataset.",
+}
+_VAGUE_TIME_PHRASES = tuple(_VAGUE_TIME_MSG)
+def _match_vague_time(t_lower: str) -> Optional[str]:
+    """Return the first vague phrase in the text, unless a real period is also given."""
+    for phrase in _VAGUE_TIME_PHRASES:
+        if phrase in t_lower:
+            return None if _has_time_context(t_lower) else phrase
     return None
+def _handle_vague_time_reference(t_lower: str) -> Optional[str]:
+    phrase = _match_vague_time(t_lower)
+    if phrase is None:
+        return None
+    print(f"\n{_VAGUE_TIME_MSG[phrase]}")
+    print("Try: 'show trips in November 2022' or 'fares in Q4 2022'\n")
+    return ""
 # =============================================================================
 # Main meta/guidance handler
 # =============================================================================
-def _handle_meta_or_guidance(user_input: str) -> Optional[str]:
+_BARE_YES_NO = frozenset({"y", "yes", "yeah", "yep", "ok", "okay", "sure", "n", "no", "nope"})
+_GREETINGS = ("hey", "hi ", "hi,", "hello", "i'm new", "what can you do",
+              "good morning", "good afternoon", "good evening")
+_INTRO_BANNER = "\nI can help with NYC taxi data in 2022.\nTopics: trips, fares, tips, vendors\nType 'help' for examples.\n"
+_EXPLAIN_TRIGGERS = ("explain the result", "explain this", "explain it", "like i'm new", "like i am new", "eli5")
+# "row"/"record" are substrings of "rows"/"records" (and every sample
+# trigger contains "sample"), so the shortest forms are exhaustive
+_ROW_TRIGGERS = ("row", "record")
+_COMPARE_TRIGGERS = ("compare", "versus", "vs")
+_TRAVEL_WORDS = ("travel", "ride", "go")
+def _handle_meta_or_guidance(user_input: str, lowered: Optional[str] = None) -> Optional[str]:
+    # `lowered` is the stripped, lowercased input when the caller already has it
     t = user_input.strip()
-    t_lower = t.lower()
+    t_lower = t.lower() if lowered is None else lowered
 
     # If the user types a bare yes/no outside of a prompt, guide them back.
-    if t_lower in {"y", "yes", "yeah", "yep", "ok", "okay", "sure", "n", "no", "nope"}:
+    if t_lower in _BARE_YES_NO:
         return "I didn’t ask a yes/no question yet 🙂\nTry asking something like: 'show trips in April 2022 by week' or type 'help'."
     
     # Numbered follow-up
     if t.isdigit():
         return _handle_numbered_followup(t)
     # Explain last result (friendly UX)
-    if any(k in t_lower for k in ["explain the result", "explain this", "explain it", "like i'm new", "like i am new", "eli5"]):
+    if _contains_any(t_lower, _EXPLAIN_TRIGGERS):
         style = "newbie" if ("new" in t_lower or "eli5" in t_lower) else "simple"
         explain_last_result(style=style)
         return ""
     # Quick revision: user says "use 2022-... to 2022-... instead"
     # Treat as a continuation by rewriting into a supported query.
-    if t_lower.startswith("use ") and ("2022-" in t_lower) and (" to " in t_lower or "-" in t_lower):
-        dates = re.findall(r"\b2022-\d{2}-\d{2}\b", t_lower)
+    # "2022-" already implies the "-" separator the range needs
+    if t_lower.startswith("use ") and "2022-" in t_lower:
+        dates = ISO_2022_RE.findall(t_lower)
         if len(dates) >= 2:
             d1, d2 = dates[0], dates[1]
             # Re-route into a normal supported query so the router understands it.
             return f"show trips from {d1} to {d2} by week"
     # Follow-up: sample rows (use previous period if available)
-    if any(k in t_lower for k in ["sample", "show me a sample", "show a sample", "sample of"]) and any(k in t_lower for k in ["row", "rows", "record", "records"]):
+    if "sample" in t_lower and _contains_any(t_lower, _ROW_TRIGGERS):
         n = 100
-        mnum = re.search(r"\b(\d{1,4})\b", t_lower)
+        mnum = SMALL_NUM_RE.search(t_lower)
         if mnum:
             n = max(1, min(int(mnum.group(1)), 1000))
         # Prefer the last executed range; fall back to the current session range; then fall back to a small default window.
@@ -1067,7 +1280,7 @@ def _handle_meta_or_guidance(user_input: str) -> Optional[str]:
             return f"show a sample of {n} rows from {_date_to_str(sd)} to {_date_to_str(ed)}"
         return f"show a sample of {n} rows from 2022-01-01 to 2022-01-08"
     # Follow-up: compare to another month (use previous topic + granularity)
-    if any(k in t_lower for k in ["compare", "versus", "vs"]) and _find_months_in_text(t_lower):
+    if _contains_any(t_lower, _COMPARE_TRIGGERS) and _signals(t_lower).months:
         ctx = session_state.get("_last_query_context") or {}
         topic_intent = ctx.get("intent") or "trip_frequency"
         gran = ctx.get("granularity") or "weekly"
@@ -1080,17 +1293,21 @@ def _handle_meta_or_guidance(user_input: str) -> Optional[str]:
             return f"show {metric_txt} tips in {t_lower} by {gran}"
         return f"show trips in {t_lower} by {gran}"
     # Question: best day to travel (guided)
-    if "best day" in t_lower and any(k in t_lower for k in ["travel", "ride", "go"]):
+    if "best day" in t_lower and _contains_any(t_lower, _TRAVEL_WORDS):
         print("\n❓ Quick clarification for 'best day':")
         print("What does *best* mean for you?")
         print("  1) Cheapest (lowest average total amount)")
         print("  2) Most available (highest trip count)")
         try:
-            choice = input("Choose 1/2 [1]: ").strip() or "1"
+            raw = input("Choose 1/2 [1]: ").strip()
         except (EOFError, KeyboardInterrupt):
             print("\n")
             return ""
-        period = input("Which period? (example: April 2022): ").strip() or "April 2022"
+        # Accept the choice and period on one line ("2 April 2022")
+        choice, _, period = raw.partition(" ")
+        if choice not in ("1", "2"):
+            choice, period = raw or "1", ""
+        period = period.strip() or input("Which period? (example: April 2022): ").strip() or "April 2022"
         if choice == "2":
             session_state["_postprocess"] = {"type": "best_day", "mode": "max_trips"}
             return f"show trips in {period} by daily"
@@ -1101,29 +1318,18 @@ def _handle_meta_or_guidance(user_input: str) -> Optional[str]:
         contextual_help(user_input)
         return ""
     
-    # Help-ish questions
-    if HELPISH_RE.search(t_lower):
-        print("\nI can help with NYC taxi data in 2022.")
-        print("Topics: trips, fares, tips, vendors")
-        print("Type 'help' for examples.\n")
-        return ""
-    
-    # Greetings
-    greetings = ["hey", "hi ", "hi,", "hello", "i'm new", "what can you do", 
-                 "good morning", "good afternoon", "good evening"]
-    if any(g in t_lower for g in greetings):
-        print("\nI can help with NYC taxi data in 2022.")
-        print("Topics: trips, fares, tips, vendors")
-        print("Type 'help' for examples.\n")
+    # Help-ish questions and greetings
+    if HELPISH_RE.search(t_lower) or _contains_any(t_lower, _GREETINGS):
+        print(_INTRO_BANNER)
         return ""
     
     # Vague time references
-    vague = _handle_vague_time_reference(user_input)
+    vague = _handle_vague_time_reference(t_lower)
     if vague is not None:
         return vague
     
     # Unsupported queries (check BEFORE summary wizard)
-    unsupported = detect_unsupported_query(user_input)
+    unsupported = detect_unsupported_query(t_lower)
     if unsupported:
         print(f"\n{unsupported}")
         print("\nTry: 'show trips in summer 2022 by week'\n")
@@ -1159,11 +1365,11 @@ def _clarify_busier() -> Tuple[str, bool]:
             session_state["metric"] = "avg"
             return ("fare_trend", True)
         print("  ⚠️  Choose 1, 2, or 3.")
-def _needs_busier_clarification(user_input: str) -> bool:
-    t = user_input.lower()
-    busy = ["busier", "busy", "more active", "less active", "quieter", "slower"]
-    comparison = ["vs", "versus", "compared", "than", "or"]
-    return any(b in t for b in busy) and any(c in t for c in comparison)
+_BUSY_WORDS = ("busier", "busy", "more active", "less active", "quieter", "slower")
+_COMPARISON_WORDS = ("vs", "versus", "compared", "than", "or")
+def _needs_busier_clarification(user_input: str, lowered: Optional[str] = None) -> bool:
+    t = user_input.lower() if lowered is None else lowered
+    return _contains_any(t, _BUSY_WORDS) and _contains_any(t, _COMPARISON_WORDS)
 # =============================================================================
 # Multi-topic handler
 # =============================================================================
@@ -1217,18 +1423,21 @@ def run_agent():
         if not q:
             continue
 
-        # Remember if user asked for a single day ("trips on YYYY-MM-DD")
-        # Helps us keep date prompts sensible after correcting invalid dates.
-        session_state["_single_day_request"] = bool(re.search(r"\b(on|for)\s+\d{4}-\d{2}-\d{2}\b", q.lower()) and " to " not in q.lower())
-        
-        if q.lower() in ("exit", "quit", "bye", "q"):
+        ql = q.lower()
+        # Verbatim commands first: nothing below applies to them
+        if ql in _EXIT_COMMANDS:
             print("\n👋 Goodbye!\n")
             break
         
-        if q.lower() == "reset":
+        if ql == "reset":
             session_state = reset_session()
+            clear_route_caches()
             print("Session reset.\n")
             continue
+
+        # Remember if user asked for a single day ("trips on YYYY-MM-DD")
+        # Helps us keep date prompts sensible after correcting invalid dates.
+        session_state["_single_day_request"] = bool(_SINGLE_DAY_RE.search(ql)) and " to " not in ql
         
         # Security: SQL injection
         if detect_sql_injection(q):
@@ -1237,20 +1446,21 @@ def run_agent():
             continue
         
         # Meta/guidance handling
-        meta = _handle_meta_or_guidance(q)
+        meta = _handle_meta_or_guidance(q, ql)
         if meta is not None:
             if meta == "":
                 continue
             q = meta
+            ql = q.lower()
         
         # Multi-topic detection
-        multi = detect_multi_topic(q)
+        multi = detect_multi_topic(q, ql)
         if multi:
             chosen = _handle_multi_topic(multi)
             # Simplify query to chosen topic
-            q = re.sub(r'\b(trip|trips|ride|rides|fare|fares|tip|tips|vendor|vendors)\b', 
-                      '', q, flags=re.I)
+            q = _TOPIC_STRIP_RE.sub("", q)
             q = q.strip() + f" {chosen}"
+            ql = q.lower()
         
         # Preserve context for follow-ups
         last_suggestions = session_state.get("_last_suggestions", [])
@@ -1263,7 +1473,7 @@ def run_agent():
         session_state["_query_count"] = query_count
         
         # Busier clarification
-        needs_busier = _needs_busier_clarification(q)
+        needs_busier = _needs_busier_clarification(q, ql)
         
         # Semantic rewrite
         rewrite = semantic_rewrite(q)
@@ -1292,7 +1502,7 @@ def run_agent():
             print("  Let's enter valid dates.\n")
             # If the user asked for a single day (e.g., "trips on ..."), make it easy:
             # ask for one start_date and auto-set end_date to next day.
-            single_day_hint = (" on " in q.lower()) and (" to " not in q.lower()) and ("from" not in q.lower())
+            single_day_hint = (" on " in ql) and (" to " not in ql) and ("from" not in ql)
             session_state["start_date"] = None
             session_state["end_date"] = None
             if single_day_hint:
@@ -1396,9 +1606,12 @@ def run_agent():
             continue
         
 
+        # Slots are final from here on (only granularity can still change)
+        start_dt, end_dt = session_state["start_date"], session_state["end_date"]
+        days = (end_dt - start_dt).days
+
         # Warn if granularity seems too coarse for a short range
         if intent in ("trip_frequency", "fare_trend", "tip_trend") and session_state.get("granularity"):
-            days = (session_state["end_date"] - session_state["start_date"]).days
             if days <= 7 and session_state["granularity"] != "daily":
                 print(f"\n💡 Note: Your range is only {days} day(s).")
                 print("   Daily usually makes more sense than weekly/monthly for such a short window.")
@@ -1407,7 +1620,6 @@ def run_agent():
 
         # Warn about large daily queries
         if intent in ("trip_frequency", "fare_trend", "tip_trend") and session_state.get("granularity") == "daily":
-            days = (session_state["end_date"] - session_state["start_date"]).days
             if days > 90:
                 print(f"\n⚠️  Daily granularity for {days} days = many rows.")
                 print("   Consider 'weekly' or 'monthly' for clearer trends.")
@@ -1417,30 +1629,21 @@ def run_agent():
 
 
         # Build and show plan
-        sd = _date_to_str(session_state["start_date"])
-        ed = _date_to_str(session_state["end_date"])
+        sd = _date_to_str(start_dt)
+        ed = _date_to_str(end_dt)
         gran = session_state.get("granularity")
         metric = session_state.get("metric")
         
-        task_names = {
-            "trip_frequency": "Count trips over time",
-            "vendor_inactivity": "Rank vendors by trip count (lowest = most inactive)",
-            "fare_trend": f"{'Sum' if metric=='total' else 'Average'} fares over time",
-            "tip_trend": f"{'Sum' if metric=='total' else 'Average'} tips over time",
-            "sample_rows": "Show a safe sample of raw trip rows",
-        }
-        
         print("\n" + "="*60)
         print("🧠 EXECUTION PLAN")
         print("="*60)
-        print(f"📌 Task: {task_names[intent]}")
+        print(f"📌 Task: {_TASK_LABELS[intent].format(agg='Sum' if metric == 'total' else 'Average')}")
         print(f"📅 Period: {sd} to {ed} (exclusive)")
         if gran:
             print(f"⏱️  Granularity: {gran}")
         if metric and intent in ("fare_trend", "tip_trend"):
             print(f"📊 Metric: {metric}")
-        rows = estimate_rows(intent, session_state["start_date"], 
-                            session_state["end_date"], gran)
+        rows = estimate_rows(intent, start_dt, end_dt, gran)
         print(f"💾 Expected output: {rows} rows")
         print("="*60 + "\n")
         
@@ -1483,29 +1686,29 @@ def run_agent():
         print(df.head(20))
         print(f"\nDone. Returned {len(df)} rows.\n")
         # Save last result for follow-ups / explanation
-        if sql is not None:
-            session_state["_last_sql"] = sql
-        session_state["_last_df"] = df
-        session_state["_last_df_rows"] = len(df)
-        session_state["_last_user_question"] = q
-        # Update follow-up context (used by "compare", "sample", "explain")
         try:
-            session_state["_query_count"] = int(session_state.get("_query_count", 0)) + 1
+            count = int(session_state.get("_query_count", 0)) + 1
         except Exception:
-            session_state["_query_count"] = 1
-        try:
-            # Ensure context exists even if suggestions are not printed
-            session_state["_last_query_context"] = {
-                "intent": session_state.get("intent"),
-                "start_date": session_state.get("start_date"),
-                "end_date": session_state.get("end_date"),
-                "granularity": session_state.get("granularity"),
-                "metric": session_state.get("metric"),
-            }
-        except Exception:
-            pass
+            count = 1
+        # Update follow-up context (used by "compare", "sample", "explain");
+        # the context exists even if suggestions are not printed
+        session_state.update({
+            "_last_sql": sql,
+            "_last_df": df,
+            "_last_df_rows": len(df),
+            "_last_df_cols_lower": frozenset(str(c).lower() for c in df.columns),
+            "_last_user_question": q,
+            "_query_count": count,
+            "_last_query_context": {
+                "intent": intent,
+                "start_date": start_dt,
+                "end_date": end_dt,
+                "granularity": gran,
+                "metric": metric,
+            },
+        })
         try:
-            suggest_followup(session_state.get("intent") or "trip_frequency")
+            suggest_followup(intent or "trip_frequency")
         except Exception:
             pass
         # Post-processing hooks (e.g., best day)
@@ -1513,14 +1716,16 @@ def run_agent():
         if pp.get("type") == "best_day":
             try:
                 if pp.get("mode") == "max_trips" and len(df.columns) >= 2:
-                    ycol = df.columns[1]
-                    best = df.loc[df[ycol].idxmax()]
+                    # Positional argmax/iat: no label lookup or row Series copy
+                    y = df.iloc[:, 1]
+                    i = y.argmax()
                     print("🏆 Best day (most available):")
-                    print(f"   {best[df.columns[0]]} with {int(best[ycol])} trips\n")
+                    print(f"   {df.iat[i, 0]} with {int(y.iat[i])} trips\n")
                 elif pp.get("mode") == "min_total_amount" and "value" in df.columns:
-                    best = df.loc[df["value"].idxmin()]
+                    y = df["value"]
+                    i = y.argmin()
                     print("🏆 Best day (cheapest by avg total amount):")
-                    print(f"   {best[df.columns[0]]} with avg total ${float(best['value']):.2f}\n")
+                    print(f"   {df.iat[i, 0]} with avg total ${float(y.iat[i]):.2f}\n")
             except Exception:
                 pass
             finally:
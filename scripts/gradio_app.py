@@ -22,17 +22,20 @@ ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))
 
 # Import your existing modules
-from symbiote_lite.router import configure_model, ask_router, semantic_rewrite
+from symbiote_lite.router import configure_model, heuristic_route, rewrite_and_route
 from symbiote_lite.slots import (
     reset_session,
     missing_slots,
     extract_slots_from_text,
     validate_all_slots,
+    validate_dates_state,
+    normalize_granularity,
+    normalize_metric,
     SUPPORTED_INTENTS,
 )
-from symbiote_lite.dates import recommend_granularity
-from symbiote_lite.sql.builder import build_sql
-from symbiote_lite.sql.safety import safe_select_only, detect_sql_injection
+from symbiote_lite.dates import recommend_granularity, validate_date, _parse_date
+from symbiote_lite.sql.builder import build_sql_params, render_sql
+from symbiote_lite.sql.safety import detect_sql_injection
 from symbiote_lite.tools.executor import DirectToolExecutor
 from symbiote_lite.explain import explain_sql, estimate_rows, DATASET_YEAR
 
@@ -218,9 +221,22 @@ CUSTOM_CSS = """
 # AGENT STATE MANAGEMENT
 # ============================================================
 
+# Shared by every session: the model shim wraps the router's process-wide
+# OpenAI client, and the executor is stateless (SQLite connections are
+# thread-local in symbiote_lite.sql.executor), so neither needs a lock
+_MODEL = configure_model()
+_EXECUTOR = DirectToolExecutor()
+
+
 class GradioAgentState:
     """Manages conversation state for the Gradio interface."""
     
+    # One instance per session; fixed attributes, no per-instance __dict__
+    __slots__ = (
+        "model", "executor", "state", "stage", "pending_sql", "pending_params",
+        "pending_slot", "pending_clarification", "last_query",
+    )
+    
     STAGE_IDLE = "idle"
     STAGE_AWAITING_PLAN_APPROVAL = "awaiting_plan_approval"
     STAGE_AWAITING_SQL_APPROVAL = "awaiting_sql_approval"
@@ -228,8 +244,8 @@ class GradioAgentState:
     STAGE_AWAITING_CLARIFICATION = "awaiting_clarification"
     
     def __init__(self):
-        self.model = configure_model()
-        self.executor = DirectToolExecutor()
+        self.model = _MODEL
+        self.executor = _EXECUTOR
         self.reset()
     
     def reset(self):
@@ -237,19 +253,20 @@ class GradioAgentState:
         self.state = reset_session()
         self.stage = self.STAGE_IDLE
         self.pending_sql = None
+        self.pending_params = None
         self.pending_slot = None
         self.pending_clarification = None
         self.last_query = None
     
     def get_model_status(self) -> str:
         """Return model status string"""
-        if os.getenv("OPENAI_API_KEY") and self.model:
-            return "LLM Active"
-        return "Deterministic"
+        return _model_status(self.model)
 
 
-# Global agent instance
-agent = GradioAgentState()
+def _model_status(model: Any) -> str:
+    if os.getenv("OPENAI_API_KEY") and model:
+        return "LLM Active"
+    return "Deterministic"
 
 
 # ============================================================
@@ -258,42 +275,67 @@ agent = GradioAgentState()
 
 import re
 
+# Compiled once at import; IGNORECASE matches the raw input without a lowered copy
 UNSUPPORTED_PATTERNS = [
-    (r"\b(weekend|weekday|saturday|sunday|weekends|weekdays)\s.*(busy|busier|more|less|compar|vs|than)",
+    (re.compile(r"\b(weekend|weekday|saturday|sunday|weekends|weekdays)\s.*(busy|busier|more|less|compar|vs|than)", re.I),
      "Weekend vs weekday breakdown isn't supported yet. Try daily/weekly/monthly aggregation."),
-    (r"\b(hour|hourly|morning|evening|afternoon|night|midnight|noon)\b",
+    (re.compile(r"\b(hour|hourly|morning|evening|afternoon|night|midnight|noon)\b", re.I),
      "Hourly breakdown isn't supported yet. Try: daily, weekly, or monthly."),
-    (r"\b(location|borough|zone|pickup.?location|dropoff.?location|manhattan|brooklyn|queens|bronx|staten)\b",
+    (re.compile(r"\b(location|borough|zone|pickup.?location|dropoff.?location|manhattan|brooklyn|queens|bronx|staten)\b", re.I),
      "Location-based analysis isn't supported yet. I can analyze trips, fares, tips, and vendors over time."),
-    (r"\b(driver|drivers|driver.?id)\b",
+    (re.compile(r"\b(driver|drivers|driver.?id)\b", re.I),
      "Driver-level analysis isn't available. I can show vendor (company) level data instead."),
-    (r"\b(passenger|passengers|rider|riders)\b",
+    (re.compile(r"\b(passenger|passengers|rider|riders)\b", re.I),
      "Passenger-level analysis isn't available. I can analyze trip counts, fares, and tips over time."),
-    (r"\b(distance|mile|miles|km|kilometer)\b",
+    (re.compile(r"\b(distance|mile|miles|km|kilometer)\b", re.I),
      "Distance-based analysis isn't supported yet. Try: fare trends or trip counts instead."),
-    (r"\b(payment|cash|card|credit|debit)\b",
+    (re.compile(r"\b(payment|cash|card|credit|debit)\b", re.I),
      "Payment type breakdown isn't supported yet. I can analyze total fares, tips, and trip counts."),
 ]
 
+# Each pattern needs its first group to match, and every alternative there
+# contains a plain word (its longest letter run: "pickup.?location" ->
+# "location"). ASCII text (where lower() agrees with IGNORECASE) holding none
+# of these words can't match any pattern, so the loop below is skipped.
+_UNSUPPORTED_TRIGGERS = tuple(sorted({
+    max(re.findall(r"[a-z]+", alt), key=len)
+    for pattern, _ in UNSUPPORTED_PATTERNS
+    for alt in re.search(r"\(([^()]*)\)", pattern.pattern).group(1).split("|")
+}))
+
 def detect_unsupported_query(user_input: str) -> Optional[str]:
-    t = (user_input or "").lower()
+    t = user_input or ""
+    if t.isascii():
+        lowered = t.lower()
+        if not any(w in lowered for w in _UNSUPPORTED_TRIGGERS):
+            return None
     for pattern, explanation in UNSUPPORTED_PATTERNS:
-        if re.search(pattern, t):
+        if pattern.search(t):
             return explanation
     return None
 
 
+# Case-insensitive substring alternations (same matches as `w in text.lower()`)
+_BUSY_RE = re.compile(r"busy|busier|more active|less active|quieter|slower", re.I)
+_COMPARISON_RE = re.compile(r"vs|versus|compared|than|or", re.I)
+
 def needs_busier_clarification(user_input: str) -> bool:
-    t = user_input.lower()
-    busy = ["busier", "busy", "more active", "less active", "quieter", "slower"]
-    comparison = ["vs", "versus", "compared", "than", "or"]
-    return any(b in t for b in busy) and any(c in t for c in comparison)
+    return bool(_BUSY_RE.search(user_input) and _COMPARISON_RE.search(user_input))
 
 
 # ============================================================
 # FORMATTING HELPERS
 # ============================================================
 
+# Plan "Task" row per intent; {agg} is filled from the metric for trends
+_PLAN_TASK_LABELS = {
+    "trip_frequency": "📊 Count trips over time",
+    "vendor_inactivity": "🏢 Rank vendors by activity",
+    "fare_trend": "💰 {agg} fares over time",
+    "tip_trend": "💵 {agg} tips over time",
+    "sample_rows": "📋 Show sample trip rows",
+}
+
 def format_plan(state: Dict[str, Any], intent: str) -> str:
     """Format the execution plan for display"""
     sd = state["start_date"].strftime("%Y-%m-%d")
@@ -301,21 +343,13 @@ def format_plan(state: Dict[str, Any], intent: str) -> str:
     gran = state.get("granularity")
     metric = state.get("metric")
     
-    task_names = {
-        "trip_frequency": "📊 Count trips over time",
-        "vendor_inactivity": "🏢 Rank vendors by activity",
-        "fare_trend": f"💰 {'Sum' if metric=='total' else 'Average'} fares over time",
-        "tip_trend": f"💵 {'Sum' if metric=='total' else 'Average'} tips over time",
-        "sample_rows": "📋 Show sample trip rows",
-    }
-    
     rows = estimate_rows(state, intent)
     
     return f"""## 🎯 Execution Plan
 
 | Parameter | Value |
 |-----------|-------|
-| **Task** | {task_names.get(intent, 'Analyze data')} |
+| **Task** | {_PLAN_TASK_LABELS.get(intent, 'Analyze data').format(agg='Sum' if metric == 'total' else 'Average')} |
 | **Date Range** | {sd} → {ed} *(end exclusive)* |
 | **Granularity** | {gran} |
 | **Expected Rows** | ~{rows} |
@@ -357,9 +391,37 @@ This is a **read-only SELECT query** — it won't modify any data.
 *Or type `yes` / `no`*"""
 
 
+def _column_cells(col) -> List[str]:
+    """Stringify one column; floats use tabulate's default 'g' format, missing values are blank."""
+    fmt = (lambda v: f"{v:g}") if col.dtype.kind == "f" else str
+    return ["" if missing else fmt(v) for v, missing in zip(col.to_numpy(dtype=object), col.isna().to_numpy())]
+
+
+def _df_to_md(df) -> str:
+    """Render a DataFrame as a pipe Markdown table (numeric columns right-aligned)."""
+    headers = [str(c) for c in df.columns]
+    columns = [_column_cells(df.iloc[:, i]) for i in range(len(headers))]
+    numeric = [df.dtypes.iloc[i].kind in "iufb" for i in range(len(headers))]
+    widths = [max([len(h), *map(len, cells)]) for h, cells in zip(headers, columns)]
+
+    padded = [
+        [c.rjust(w) if num else c.ljust(w) for c in cells]
+        for cells, w, num in zip(columns, widths, numeric)
+    ]
+    head = "| " + " | ".join(
+        h.rjust(w) if num else h.ljust(w) for h, w, num in zip(headers, widths, numeric)
+    ) + " |"
+    sep = "|" + "|".join(
+        "-" * (w + 1) + ":" if num else ":" + "-" * (w + 1) for w, num in zip(widths, numeric)
+    ) + "|"
+    rows = ["| " + " | ".join(row) + " |" for row in zip(*padded)]
+    return "\n".join([head, sep, *rows])
+
+
 def format_results(df, state: Dict[str, Any], intent: str) -> str:
     """Format query results for display"""
-    if df is None or len(df) == 0:
+    n_rows = 0 if df is None else len(df)
+    if n_rows == 0:
         return """## ⚠️ No Results Found
 
 The query returned 0 rows. This could mean:
@@ -368,7 +430,7 @@ The query returned 0 rows. This could mean:
 
 **💡 Try:** Expanding the date range or adjusting your question."""
     
-    table = df.head(20).to_markdown(index=False)
+    table = _df_to_md(df.iloc[:20] if n_rows > 20 else df)
     
     result_lines = [
         "## ✅ Query Results",
@@ -377,10 +439,10 @@ The query returned 0 rows. This could mean:
         "",
     ]
     
-    if len(df) > 20:
-        result_lines.append(f"*📊 Showing first 20 of {len(df)} rows*")
+    if n_rows > 20:
+        result_lines.append(f"*📊 Showing first 20 of {n_rows} rows*")
     else:
-        result_lines.append(f"*📊 {len(df)} rows returned*")
+        result_lines.append(f"*📊 {n_rows} rows returned*")
     
     result_lines.extend([
         "",
@@ -397,10 +459,7 @@ The query returned 0 rows. This could mean:
     return "\n".join(result_lines)
 
 
-def format_slot_prompt(slot: str, state: Dict[str, Any]) -> str:
-    """Format prompt for missing slot with helpful guidance"""
-    if slot == "start_date":
-        return """## 📅 Start Date Needed
+_SLOT_PROMPT_START_DATE = """## 📅 Start Date Needed
 
 Please enter the **start date** for your analysis.
 
@@ -415,8 +474,7 @@ Please enter the **start date** for your analysis.
 - `2022-04-01` — Start of Q2
 - `2022-07-01` — Start of Q3"""
 
-    elif slot == "end_date":
-        return """## 📅 End Date Needed
+_SLOT_PROMPT_END_DATE = """## 📅 End Date Needed
 
 Please enter the **end date** for your analysis.
 
@@ -431,26 +489,7 @@ Please enter the **end date** for your analysis.
 - `2022-04-01` — End of Q1
 - `2022-07-01` — End of Q2"""
 
-    elif slot == "granularity":
-        suggestion = "weekly"
-        if state.get("start_date") and state.get("end_date"):
-            suggestion = recommend_granularity(state["start_date"], state["end_date"])
-            days = (state["end_date"] - state["start_date"]).days
-            return f"""## ⏱️ Granularity Needed
-
-Your date range spans **{days} days**.
-
-| Option | Description | Recommendation |
-|--------|-------------|----------------|
-| `daily` | One row per day | Best for < 2 weeks |
-| `weekly` | One row per week | Best for 2 weeks - 3 months |
-| `monthly` | One row per month | Best for > 3 months |
-
-**🎯 Recommended:** `{suggestion}`
-
-*Type your choice or just enter `{suggestion}`*"""
-        
-        return """## ⏱️ Granularity Needed
+_SLOT_PROMPT_GRANULARITY = """## ⏱️ Granularity Needed
 
 Choose how to group your data:
 
@@ -460,8 +499,7 @@ Choose how to group your data:
 | `weekly` | One row per week |
 | `monthly` | One row per month |"""
 
-    elif slot == "metric":
-        return """## 📊 Metric Needed
+_SLOT_PROMPT_METRIC = """## 📊 Metric Needed
 
 How should I calculate the values?
 
@@ -472,6 +510,40 @@ How should I calculate the values?
 
 *Type `avg` or `total`*"""
 
+# Prompts that never depend on session state
+_STATIC_SLOT_PROMPTS = {
+    "start_date": _SLOT_PROMPT_START_DATE,
+    "end_date": _SLOT_PROMPT_END_DATE,
+    "metric": _SLOT_PROMPT_METRIC,
+}
+
+
+def format_slot_prompt(slot: str, state: Dict[str, Any]) -> str:
+    """Format prompt for missing slot with helpful guidance"""
+    static = _STATIC_SLOT_PROMPTS.get(slot)
+    if static is not None:
+        return static
+
+    if slot == "granularity":
+        suggestion = "weekly"
+        if state.get("start_date") and state.get("end_date"):
+            suggestion = recommend_granularity(state["start_date"], state["end_date"])
+            days = (state["end_date"] - state["start_date"]).days
+            return f"""## ⏱️ Granularity Needed
+
+Your date range spans **{days} days**.
+
+| Option | Description | Recommendation |
+|--------|-------------|----------------|
+| `daily` | One row per day | Best for < 2 weeks |
+| `weekly` | One row per week | Best for 2 weeks - 3 months |
+| `monthly` | One row per month | Best for > 3 months |
+
+**🎯 Recommended:** `{suggestion}`
+
+*Type your choice or just enter `{suggestion}`*"""
+        return _SLOT_PROMPT_GRANULARITY
+
     return f"Please provide: **{slot}**"
 
 
@@ -479,9 +551,15 @@ How should I calculate the values?
 # MAIN CHAT HANDLER
 # ============================================================
 
-def process_message(user_message: str, history: List) -> str:
+# Reply vocabularies (matched against the lowered, stripped message)
+RESET_CMDS = frozenset({"reset", "clear", "start over"})
+HELP_CMDS = frozenset({"help", "?"})
+YES_PLAN = frozenset({"yes", "y", "approve", "ok", "okay", "sure", "proceed"})
+YES_SQL = frozenset({"yes", "y", "run", "execute", "ok", "okay", "sure"})
+NO_REPLIES = frozenset({"no", "n", "cancel", "stop", "abort", "nope"})
+
+def process_message(user_message: str, history: List, agent: GradioAgentState) -> str:
     """Main message processor - handles the approval workflow."""
-    global agent
     
     user_message = user_message.strip()
     if not user_message:
@@ -490,56 +568,72 @@ def process_message(user_message: str, history: List) -> str:
     user_lower = user_message.lower()
     
     # Handle special commands
-    if user_lower in ("reset", "clear", "start over"):
+    if user_lower in RESET_CMDS:
         agent.reset()
         return "## 🔄 Session Reset\n\nI've cleared everything. What would you like to analyze?\n\n*Click an example below or type your question!*"
     
-    if user_lower in ("help", "?"):
+    if user_lower in HELP_CMDS:
         return WELCOME_MESSAGE
     
-    # Handle approval responses
-    if agent.stage == agent.STAGE_AWAITING_PLAN_APPROVAL:
-        if user_lower in ("yes", "y", "approve", "ok", "okay", "sure", "proceed"):
-            return handle_plan_approved()
-        elif user_lower in ("no", "n", "cancel", "stop", "abort", "nope"):
-            agent.stage = agent.STAGE_IDLE
-            return "## ❌ Plan Cancelled\n\nNo problem! What else would you like to analyze?\n\n*Click an example or type a new question.*"
-        else:
-            return """## ⏳ Waiting for Approval
+    # Stage-specific replies (approval gates, slot filling, clarification)
+    handler = _STAGE_HANDLERS.get(agent.stage)
+    if handler is not None:
+        return handler(user_message, user_lower, agent)
+    
+    return process_new_query(user_message, agent)
+
+
+def _handle_plan_stage(user_message: str, user_lower: str, agent: GradioAgentState) -> str:
+    """Reply while the execution plan awaits approval"""
+    if user_lower in YES_PLAN:
+        return handle_plan_approved(agent)
+    elif user_lower in NO_REPLIES:
+        agent.stage = agent.STAGE_IDLE
+        return "## ❌ Plan Cancelled\n\nNo problem! What else would you like to analyze?\n\n*Click an example or type a new question.*"
+    else:
+        return """## ⏳ Waiting for Approval
 
 Please respond with:
 - **✅ Yes** (or click the button) to approve
 - **❌ No** (or click the button) to cancel
 
 *Or type `yes` / `no`*"""
-    
-    if agent.stage == agent.STAGE_AWAITING_SQL_APPROVAL:
-        if user_lower in ("yes", "y", "run", "execute", "ok", "okay", "sure"):
-            return handle_sql_approved()
-        elif user_lower in ("no", "n", "cancel", "stop", "abort", "nope"):
-            agent.stage = agent.STAGE_IDLE
-            return "## ❌ Query Cancelled\n\nNo worries! What else would you like to analyze?\n\n*Click an example or type a new question.*"
-        else:
-            return """## ⏳ Waiting for SQL Approval
+
+
+def _handle_sql_stage(user_message: str, user_lower: str, agent: GradioAgentState) -> str:
+    """Reply while the SQL query awaits approval"""
+    if user_lower in YES_SQL:
+        return handle_sql_approved(agent)
+    elif user_lower in NO_REPLIES:
+        agent.stage = agent.STAGE_IDLE
+        return "## ❌ Query Cancelled\n\nNo worries! What else would you like to analyze?\n\n*Click an example or type a new question.*"
+    else:
+        return """## ⏳ Waiting for SQL Approval
 
 Please respond with:
 - **✅ Yes** (or click the button) to run the query
 - **❌ No** (or click the button) to cancel
 
 *Or type `yes` / `no`*"""
-    
-    if agent.stage == agent.STAGE_AWAITING_SLOT:
-        return handle_slot_response(user_message)
-    
-    if agent.stage == agent.STAGE_AWAITING_CLARIFICATION:
-        return handle_clarification_response(user_message)
-    
-    return process_new_query(user_message)
 
 
-def process_new_query(query: str) -> str:
+# agent.stage -> handler(user_message, user_lower, agent); any other stage
+# (idle) starts a new query. Resolved at call time, so later defs are fine.
+_STAGE_HANDLERS = {
+    GradioAgentState.STAGE_AWAITING_PLAN_APPROVAL: _handle_plan_stage,
+    GradioAgentState.STAGE_AWAITING_SQL_APPROVAL: _handle_sql_stage,
+    GradioAgentState.STAGE_AWAITING_SLOT: lambda msg, _lower, agent: handle_slot_response(msg, agent),
+    GradioAgentState.STAGE_AWAITING_CLARIFICATION: lambda msg, _lower, agent: handle_clarification_response(msg, agent),
+}
+
+
+# Every topic keyword is a 3+ letter word; input without one ("y", "2022",
+# "??") can't name an analysis, so it skips the LLM call. Any script counts:
+# the LLM rewrite is the only path that understands non-Latin questions.
+_WORD_RE = re.compile(r"[^\W\d_]{3}")
+
+def process_new_query(query: str, agent: GradioAgentState) -> str:
     """Process a new analytical query"""
-    global agent
     
     # Security check
     if detect_sql_injection(query):
@@ -589,8 +683,11 @@ When you say "busier", what do you mean?
     agent.state["_last_query_context"] = last_context
     agent.last_query = query
     
-    # Semantic rewrite
-    rewrite = semantic_rewrite(agent.model, query)
+    # Semantic rewrite + route (one LLM call when available)
+    if _WORD_RE.search(query):
+        rewrite, route = rewrite_and_route(agent.model, query)
+    else:
+        rewrite, route = {}, heuristic_route(query)
     rewritten = (rewrite.get("rewritten") or query).strip()
     
     # Apply LLM hints
@@ -603,8 +700,6 @@ When you say "busier", what do you mean?
     extract_slots_from_text(agent.state, rewritten)
     
     # Route the intent
-    route = ask_router(agent.model, rewritten)
-    
     if not route.get("dataset_match", True):
         return """## ❌ Out of Scope
 
@@ -644,33 +739,28 @@ I can help with these types of analysis:
         agent.stage = agent.STAGE_AWAITING_SLOT
         return format_slot_prompt(missing[0], agent.state)
     
-    return show_plan()
+    return show_plan(agent)
 
 
-def handle_slot_response(response: str) -> str:
+def handle_slot_response(response: str, agent: GradioAgentState) -> str:
     """Handle user response to slot prompt"""
-    global agent
     
     slot = agent.pending_slot
     response = response.strip()
     
     try:
         if slot == "start_date":
-            from symbiote_lite.dates import validate_date, _parse_date
             validate_date(response)
             agent.state["start_date"] = _parse_date(response)
         
         elif slot == "end_date":
-            from symbiote_lite.dates import validate_date, _parse_date
             validate_date(response)
             agent.state["end_date"] = _parse_date(response)
         
         elif slot == "granularity":
-            from symbiote_lite.slots import normalize_granularity
             agent.state["granularity"] = normalize_granularity(response)
         
         elif slot == "metric":
-            from symbiote_lite.slots import normalize_metric
             agent.state["metric"] = normalize_metric(response)
         
     except ValueError as e:
@@ -692,12 +782,11 @@ def handle_slot_response(response: str) -> str:
     
     agent.pending_slot = None
     agent.stage = agent.STAGE_IDLE
-    return show_plan()
+    return show_plan(agent)
 
 
-def handle_clarification_response(response: str) -> str:
+def handle_clarification_response(response: str, agent: GradioAgentState) -> str:
     """Handle clarification responses"""
-    global agent
     
     response = response.strip()
     
@@ -725,7 +814,8 @@ Please type `1`, `2`, or `3` to clarify what "busier" means:
         agent.stage = agent.STAGE_IDLE
         
         query = agent.last_query
-        rewrite = semantic_rewrite(agent.model, query)
+        # Same call as the first pass, so this is served from the LLM cache
+        rewrite, _ = rewrite_and_route(agent.model, query)
         rewritten = (rewrite.get("rewritten") or query).strip()
         extract_slots_from_text(agent.state, rewritten)
         
@@ -737,17 +827,15 @@ Please type `1`, `2`, or `3` to clarify what "busier" means:
             agent.stage = agent.STAGE_AWAITING_SLOT
             return format_slot_prompt(missing[0], agent.state)
         
-        return show_plan()
+        return show_plan(agent)
     
     return "Something went wrong. Please type `reset` and try again."
 
 
-def show_plan() -> str:
+def show_plan(agent: GradioAgentState) -> str:
     """Validate slots and show execution plan"""
-    global agent
     
     try:
-        from symbiote_lite.slots import validate_dates_state
         validate_dates_state(agent.state)
     except Exception as e:
         agent.state["start_date"] = None
@@ -774,31 +862,33 @@ Let's fix this — please provide a valid start date.
     return format_plan(agent.state, intent)
 
 
-def handle_plan_approved() -> str:
+def handle_plan_approved(agent: GradioAgentState) -> str:
     """Handle plan approval - build and show SQL"""
-    global agent
     
     intent = agent.state["intent"]
-    sql = safe_select_only(build_sql(agent.state, intent))
-    agent.pending_sql = sql
+    template, params = build_sql_params(agent.state, intent)
+    sql = render_sql(template, params)
+    agent.pending_sql = template
+    agent.pending_params = params
     agent.stage = agent.STAGE_AWAITING_SQL_APPROVAL
     
     return format_sql_approval(sql, agent.state, intent)
 
 
-def handle_sql_approved() -> str:
+def handle_sql_approved(agent: GradioAgentState) -> str:
     """Handle SQL approval - execute query"""
-    global agent
     
     sql = agent.pending_sql
+    params = agent.pending_params
     
     try:
-        result = agent.executor.execute_sql(sql)
+        result = agent.executor.execute_sql(sql, params=params)
         df = result.get("dataframe")
         
         if df is None or len(df) == 0:
             agent.stage = agent.STAGE_IDLE
             agent.pending_sql = None
+            agent.pending_params = None
             return """## ⚠️ No Results
 
 The query returned 0 rows.
@@ -810,24 +900,29 @@ The query returned 0 rows.
 
 *Click an example button to try a known-working query!*"""
         
-        agent.state["_last_sql"] = sql
-        agent.state["_last_df"] = df
-        agent.state["_last_query_context"] = {
-            "intent": agent.state.get("intent"),
-            "start_date": agent.state.get("start_date"),
-            "end_date": agent.state.get("end_date"),
-            "granularity": agent.state.get("granularity"),
-            "metric": agent.state.get("metric"),
-        }
+        state = agent.state
+        state.update(
+            _last_sql=render_sql(sql, params),
+            _last_df=df,
+            _last_query_context={
+                "intent": state.get("intent"),
+                "start_date": state.get("start_date"),
+                "end_date": state.get("end_date"),
+                "granularity": state.get("granularity"),
+                "metric": state.get("metric"),
+            },
+        )
         
         agent.stage = agent.STAGE_IDLE
         agent.pending_sql = None
+        agent.pending_params = None
         
-        return format_results(df, agent.state, agent.state["intent"])
+        return format_results(df, state, state["intent"])
         
     except Exception as e:
         agent.stage = agent.STAGE_IDLE
         agent.pending_sql = None
+        agent.pending_params = None
         return f"""## ❌ Query Failed
 
 **Error:** {e}
@@ -842,10 +937,16 @@ This might be a temporary issue. Please try:
 # GRADIO UI
 # ============================================================
 
+# Handlers that may run at once per event (LLM and SQL waits release the GIL)
+UI_CONCURRENCY_LIMIT = int(os.getenv("SYMBIOTE_UI_CONCURRENCY", "8"))
+
 def create_interface():
     """Create and configure the Gradio interface"""
     
     with gr.Blocks(title="Symbiote Lite Analyst") as demo:
+        # One GradioAgentState per browser session (built on page load), so
+        # concurrent users never share slots or approval stages
+        agent_state = gr.State(GradioAgentState)
         
         # Header
         gr.HTML(f"""
@@ -857,7 +958,7 @@ def create_interface():
                 </p>
             </div>
             <div>
-                <span class="status-badge badge-green">⚡ {agent.get_model_status()}</span>
+                <span class="status-badge badge-green">⚡ {_model_status(_MODEL)}</span>
                 <span class="status-badge badge-blue">🔒 Safe SQL Only</span>
             </div>
         </div>
@@ -914,44 +1015,53 @@ def create_interface():
         """)
         
         # Event handlers
-        def respond(message: str, chat_history: List):
+        # Handlers mutate the session's GradioAgentState in place, so it is
+        # only passed as an input
+        def respond(message: str, chat_history: List, agent: GradioAgentState):
             if not message.strip():
                 return "", chat_history
             
-            chat_history = chat_history + [{"role": "user", "content": message}]
-            response = process_message(message, chat_history)
-            chat_history = chat_history + [{"role": "assistant", "content": response}]
+            # One copy per turn (Gradio's list stays untouched), then appends
+            chat_history = list(chat_history)
+            chat_history.append({"role": "user", "content": message})
+            response = process_message(message, chat_history, agent)
+            chat_history.append({"role": "assistant", "content": response})
             
             return "", chat_history
         
-        def quick_action(action: str, chat_history: List):
-            chat_history = chat_history + [{"role": "user", "content": action}]
-            response = process_message(action, chat_history)
-            chat_history = chat_history + [{"role": "assistant", "content": response}]
+        def quick_action(action: str, chat_history: List, agent: GradioAgentState):
+            chat_history = list(chat_history)
+            chat_history.append({"role": "user", "content": action})
+            response = process_message(action, chat_history, agent)
+            chat_history.append({"role": "assistant", "content": response})
             return chat_history
         
-        def clear_chat():
+        def clear_chat(agent: GradioAgentState):
             agent.reset()
             return [{"role": "assistant", "content": WELCOME_MESSAGE}], ""
         
-        def use_example(example_text: str, chat_history: List):
-            return respond(example_text, chat_history)
+        def use_example(example_text: str, chat_history: List, agent: GradioAgentState):
+            return respond(example_text, chat_history, agent)
         
         # Bindings
-        msg.submit(respond, [msg, chatbot], [msg, chatbot])
-        submit_btn.click(respond, [msg, chatbot], [msg, chatbot])
+        msg.submit(respond, [msg, chatbot, agent_state], [msg, chatbot])
+        submit_btn.click(respond, [msg, chatbot, agent_state], [msg, chatbot])
         
-        yes_btn.click(lambda h: quick_action("yes", h), [chatbot], [chatbot])
-        no_btn.click(lambda h: quick_action("no", h), [chatbot], [chatbot])
-        help_btn.click(lambda h: quick_action("help", h), [chatbot], [chatbot])
-        reset_btn.click(lambda h: quick_action("reset", h), [chatbot], [chatbot])
-        clear_btn.click(clear_chat, outputs=[chatbot, msg])
+        yes_btn.click(lambda h, a: quick_action("yes", h, a), [chatbot, agent_state], [chatbot])
+        no_btn.click(lambda h, a: quick_action("no", h, a), [chatbot, agent_state], [chatbot])
+        help_btn.click(lambda h, a: quick_action("help", h, a), [chatbot, agent_state], [chatbot])
+        reset_btn.click(lambda h, a: quick_action("reset", h, a), [chatbot, agent_state], [chatbot])
+        clear_btn.click(clear_chat, [agent_state], [chatbot, msg])
         
-        ex1.click(lambda h: use_example("show trips in January 2022 by week", h), [chatbot], [msg, chatbot])
-        ex2.click(lambda h: use_example("average fares in February 2022 by day", h), [chatbot], [msg, chatbot])
-        ex3.click(lambda h: use_example("total tips in Q2 2022 by month", h), [chatbot], [msg, chatbot])
-        ex4.click(lambda h: use_example("which vendors were inactive in March 2022", h), [chatbot], [msg, chatbot])
+        ex1.click(lambda h, a: use_example("show trips in January 2022 by week", h, a), [chatbot, agent_state], [msg, chatbot])
+        ex2.click(lambda h, a: use_example("average fares in February 2022 by day", h, a), [chatbot, agent_state], [msg, chatbot])
+        ex3.click(lambda h, a: use_example("total tips in Q2 2022 by month", h, a), [chatbot, agent_state], [msg, chatbot])
+        ex4.click(lambda h, a: use_example("which vendors were inactive in March 2022", h, a), [chatbot, agent_state], [msg, chatbot])
     
+    # Sync handlers already run on Gradio's worker threads; each event
+    # defaults to one at a time, so lift that now that state is per session.
+    # Set here so every launch path (make run-ui-public too) gets it.
+    demo.queue(default_concurrency_limit=UI_CONCURRENCY_LIMIT)
     return demo
 
 
@@ -960,13 +1070,6 @@ def create_interface():
 # ============================================================
 
 if __name__ == "__main__":
-    try:
-        import tabulate
-    except ImportError:
-        print("Installing tabulate...")
-        import subprocess
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "tabulate", "-q"])
-    
     print(f"Starting Symbiote Lite Analyst...")
     print(f"Gradio version: {gr.__version__}")
     
@@ -6,25 +6,25 @@ from datetime import timedelta
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
-try:
-    from dotenv import load_dotenv
-except Exception:
-    load_dotenv = None
-
-# Load .env from project root
+# Load .env from project root (SYMBIOTE_SKIP_DOTENV=1 skips the import and file read)
 ROOT = Path(__file__).resolve().parents[1]
-if load_dotenv is not None:
-    load_dotenv(ROOT / ".env")
-
-from .router import configure_model, ask_router, semantic_rewrite
+if os.getenv("SYMBIOTE_SKIP_DOTENV") != "1":
+    try:
+        from dotenv import load_dotenv
+    except Exception:
+        load_dotenv = None
+    if load_dotenv is not None:
+        load_dotenv(ROOT / ".env")
+
+from .router import configure_model, rewrite_and_route, clear_llm_cache
 from .dates import ISO_DATE_RE
 from .slots import (
     reset_session, missing_slots, extract_slots_from_text,
     validate_all_slots, validate_dates_state, normalize_granularity, normalize_metric,
     SUPPORTED_INTENTS,
 )
-from .sql.safety import detect_sql_injection, safe_select_only
-from .sql.builder import build_sql
+from .sql.safety import detect_sql_injection
+from .sql.builder import build_sql_params, render_sql
 # ============================================================
 # MCP INTEGRATION: Import the tool executor instead of direct SQL
 # ============================================================
@@ -45,7 +45,7 @@ _tool_executor = DirectToolExecutor()
 # ----------------------------
 # Unsupported query patterns
 # ----------------------------
-UNSUPPORTED_PATTERNS = [
+UNSUPPORTED_PATTERNS = (
     (r"\b(weekend|weekday|saturday|sunday|weekends|weekdays)\s.*(busy|busier|more|less|compar|vs|than)",
      "⚠️  Weekend vs weekday breakdown isn't supported yet.\nI can show daily data or weekly/monthly aggregation."),
     (r"\b(hour|hourly|morning|evening|afternoon|night|midnight|noon)\b",
@@ -60,27 +60,47 @@ UNSUPPORTED_PATTERNS = [
      "⚠️  Distance-based analysis isn't supported yet.\nTry: fare trends or trip counts instead."),
     (r"\b(payment|cash|card|credit|debit)\b",
      "⚠️  Payment type breakdown isn't supported yet.\nI can analyze total fares, tips, and trip counts."),
-]
+)
+_UNSUPPORTED_RES = tuple((re.compile(p, re.I), msg) for p, msg in UNSUPPORTED_PATTERNS)
+# One pass that rejects the common (supported) question; the per-pattern loop
+# only runs on a hit, so the first listed pattern still picks the message
+_ANY_UNSUPPORTED_RE = re.compile("|".join(f"(?:{p})" for p, _ in UNSUPPORTED_PATTERNS), re.I)
+
+# Plan "Task" line per intent; {agg} is filled from the metric for trends
+_TASK_LABELS = {
+    "trip_frequency": "Count trips over time",
+    "vendor_inactivity": "Rank vendors by trip count (lowest = most inactive)",
+    "fare_trend": "{agg} fares over time",
+    "tip_trend": "{agg} tips over time",
+    "sample_rows": "Show a safe sample of raw trip rows",
+}
+
+TOPIC_WORD_RE = re.compile(r"\b(trip|trips|ride|rides|fare|fares|tip|tips|vendor|vendors)\b", re.I)
+
+# Case-insensitive substring alternations: same matches as `w in text.lower()`
+# without allocating a lowered copy of the message per check.
+_MULTI_TOPIC_JOIN_RE = re.compile(r" and |, ", re.I)
+_MULTI_TOPIC_RES = (
+    ("trips", re.compile(r"trip|ride", re.I)),
+    ("fares", re.compile(r"fare|revenue|money|price", re.I)),
+    ("tips", re.compile(r"tip", re.I)),
+    ("vendors", re.compile(r"vendor|company|companies", re.I)),
+)
 
 def detect_unsupported_query(user_input: str) -> Optional[str]:
-    t = (user_input or "").lower()
-    for pattern, explanation in UNSUPPORTED_PATTERNS:
-        if re.search(pattern, t):
+    t = user_input or ""
+    if not _ANY_UNSUPPORTED_RE.search(t):
+        return None
+    for pattern, explanation in _UNSUPPORTED_RES:
+        if pattern.search(t):
             return explanation
     return None
 
 def detect_multi_topic(user_input: str) -> Optional[List[str]]:
-    t = (user_input or "").lower()
+    t = user_input or ""
     topics_found: List[str] = []
-    if " and " in t or ", " in t:
-        if any(w in t for w in ["trip", "trips", "ride", "rides"]):
-            topics_found.append("trips")
-        if any(w in t for w in ["fare", "fares", "revenue", "money", "price"]):
-            topics_found.append("fares")
-        if any(w in t for w in ["tip", "tips", "tipping"]):
-            topics_found.append("tips")
-        if any(w in t for w in ["vendor", "vendors", "company", "companies"]):
-            topics_found.append("vendors")
+    if _MULTI_TOPIC_JOIN_RE.search(t):
+        topics_found = [topic for topic, rx in _MULTI_TOPIC_RES if rx.search(t)]
     return topics_found if len(topics_found) >= 2 else None
 
 SUMMARY_RE = re.compile(r"\b(summar|insight|overview|what.?happened|tell me about)\b", re.I)
@@ -140,11 +160,11 @@ def _prompt_date(field: str, example: str):
         except Exception as e:
             print(f"  ⚠️  {e}")
 
+_BUSY_RE = re.compile(r"busy|busier|more active|less active|quieter|slower", re.I)
+_COMPARISON_RE = re.compile(r"vs|versus|compared|than|or", re.I)
+
 def _needs_busier_clarification(user_input: str) -> bool:
-    t = user_input.lower()
-    busy = ["busier", "busy", "more active", "less active", "quieter", "slower"]
-    comparison = ["vs", "versus", "compared", "than", "or"]
-    return any(b in t for b in busy) and any(c in t for c in comparison)
+    return bool(_BUSY_RE.search(user_input) and _COMPARISON_RE.search(user_input))
 
 def _clarify_busier(state: Dict[str, Any]) -> Tuple[str, bool]:
     print("\n❓ Quick clarification:")
@@ -172,7 +192,7 @@ def _clarify_busier(state: Dict[str, Any]) -> Tuple[str, bool]:
 # ============================================================
 # MCP INTEGRATION: Helper function to execute SQL via MCP boundary
 # ============================================================
-def _execute_via_mcp(sql: str):
+def _execute_via_mcp(sql: str, params=None):
     """
     Execute SQL through the MCP tool boundary.
     
@@ -180,7 +200,7 @@ def _execute_via_mcp(sql: str):
     The agent does NOT directly call execute_sql_query().
     Instead, it goes through the DirectToolExecutor.
     """
-    result = _tool_executor.execute_sql(sql)
+    result = _tool_executor.execute_sql(sql, params=params)
     if not result.get("success"):
         raise RuntimeError("MCP tool execution failed")
     return result.get("dataframe")
@@ -218,12 +238,14 @@ def run_agent():
         if not q:
             continue
 
-        if q.lower() in ("exit", "quit", "bye", "q"):
+        ql = q.lower()
+        if ql in ("exit", "quit", "bye", "q"):
             print("\n👋 Goodbye!\n")
             break
 
-        if q.lower() == "reset":
+        if ql == "reset":
             state = reset_session()
+            clear_llm_cache()
             print("Session reset.\n")
             continue
 
@@ -234,13 +256,13 @@ def run_agent():
             continue
 
         # Simple help
-        if q.lower() == "help":
+        if ql == "help":
             contextual_help(q)
             continue
 
         # Explain last result
-        if any(k in q.lower() for k in ["explain the result", "explain this", "explain it", "eli5", "like i'm new", "like i am new"]):
-            style = "newbie" if ("new" in q.lower() or "eli5" in q.lower()) else "simple"
+        if any(k in ql for k in ["explain the result", "explain this", "explain it", "eli5", "like i'm new", "like i am new"]):
+            style = "newbie" if ("new" in ql or "eli5" in ql) else "simple"
             explain_last_result(state, style=style)
             continue
 
@@ -266,7 +288,7 @@ def run_agent():
                     raw = "1"
                 if raw.isdigit() and 1 <= int(raw) <= len(multi):
                     chosen = multi[int(raw) - 1]
-                    q = re.sub(r"\b(trip|trips|ride|rides|fare|fares|tip|tips|vendor|vendors)\b", "", q, flags=re.I).strip()
+                    q = TOPIC_WORD_RE.sub("", q).strip()
                     q = (q + " " + chosen).strip()
                     break
                 print(f"  ⚠️  Choose 1-{len(multi)}.")
@@ -283,8 +305,8 @@ def run_agent():
 
         needs_busier = _needs_busier_clarification(q)
 
-        # Semantic rewrite (LLM optional)
-        rewrite = semantic_rewrite(model, q)
+        # Semantic rewrite + route (one LLM call when available)
+        rewrite, route = rewrite_and_route(model, q)
         rewritten = (rewrite.get("rewritten") or q).strip()
 
         # Apply LLM hints
@@ -313,7 +335,6 @@ def run_agent():
             state["_invalid_dates"] = []
 
         # Route
-        route = ask_router(model, rewritten)
         if not route.get("dataset_match", True):
             print("\n❌ Out of scope (NYC Yellow Taxi 2022 only).")
             print("Try: trips, fares, tips, or vendors in 2022.\n")
@@ -424,18 +445,10 @@ def run_agent():
         gran = state.get("granularity")
         metric = state.get("metric")
 
-        task_names = {
-            "trip_frequency": "Count trips over time",
-            "vendor_inactivity": "Rank vendors by trip count (lowest = most inactive)",
-            "fare_trend": f"{'Sum' if metric=='total' else 'Average'} fares over time",
-            "tip_trend": f"{'Sum' if metric=='total' else 'Average'} tips over time",
-            "sample_rows": "Show a safe sample of raw trip rows",
-        }
-
         print("\n" + "="*60)
         print("🧠 EXECUTION PLAN")
         print("="*60)
-        print(f"📌 Task: {task_names[intent]}")
+        print(f"📌 Task: {_TASK_LABELS[intent].format(agg='Sum' if metric == 'total' else 'Average')}")
         print(f"📅 Period: {sd} to {ed} (exclusive)")
         if gran:
             print(f"⏱️  Granularity: {gran}")
@@ -456,7 +469,8 @@ def run_agent():
         print("\n📊 What this query does:")
         print(f"   {explain_sql(state, intent)}\n")
 
-        sql = safe_select_only(build_sql(state, intent))
+        template, params = build_sql_params(state, intent)
+        sql = render_sql(template, params)
         print("SQL:")
         print(sql)
         print()
@@ -471,7 +485,7 @@ def run_agent():
         # ============================================================
         print("⏳ Running query via MCP tool executor...")
         try:
-            df = _execute_via_mcp(sql)
+            df = _execute_via_mcp(template, params)
             print("✅ Query complete (executed via MCP)!\n")
         except Exception as e:
             print(f"\n❌ Query failed: {e}")
@@ -17,8 +17,7 @@ from .slots import (
     validate_all_slots,
     validate_dates_state,
 )
-from .sql.builder import build_sql
-from .sql.safety import safe_select_only
+from .sql.builder import build_sql_params, render_sql
 # ============================================================
 # MCP INTEGRATION: Use DirectToolExecutor instead of execute_sql_query
 # ============================================================
@@ -46,12 +45,13 @@ def analyze_query(query: str) -> Dict[str, Any]:
     validate_dates_state(state)
     validate_all_slots(state)
 
-    sql = safe_select_only(build_sql(state, state["intent"]))
+    template, params = build_sql_params(state, state["intent"])
+    sql = render_sql(template, params)
     
     # ============================================================
     # MCP INTEGRATION: Execute through tool boundary
     # ============================================================
-    result = _tool_executor.execute_sql(sql)
+    result = _tool_executor.execute_sql(template, params=params)
 
     return {
         "success": result.get("success", False),
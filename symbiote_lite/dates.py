@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import re
 from datetime import datetime, timedelta
+from types import MappingProxyType
 from typing import List, Dict, Any, Optional, Tuple
 
 DATASET_YEAR = 2022
@@ -10,13 +11,17 @@ MAX_DATE = datetime(2023, 1, 1)
 
 ISO_DATE_RE = re.compile(r"\b(\d{4})[-/](\d{2})[-/](\d{2})\b")
 Q_RE = re.compile(r"\bq([1-4])\b", re.IGNORECASE)
+ANY_YEAR_RE = re.compile(r"\b20\d{2}\b")
+NON_DATASET_YEAR_RE = re.compile(r"\b20(?:1\d|2[013-9])\b")
 
-SEASON_MAP = {
+# Read-only lookup tables (MappingProxyType) so callers cannot mutate them.
+SEASON_MAP = MappingProxyType({
     "spring": (3, 6), "summer": (6, 9), "fall": (9, 12),
     "autumn": (9, 12), "winter": (1, 3),
-}
+})
+_SEASONS = tuple(SEASON_MAP.items())
 
-MONTH_MAP = {
+MONTH_MAP = MappingProxyType({
     "jan": 1, "january": 1, "janurary": 1, "janury": 1, "januarry": 1, "janaury": 1,
     "feb": 2, "february": 2, "febuary": 2, "feburary": 2, "februrary": 2, "febrary": 2,
     "mar": 3, "march": 3, "mach": 3, "mrch": 3,
@@ -29,10 +34,16 @@ MONTH_MAP = {
     "oct": 10, "october": 10, "octobor": 10, "ocotber": 10,
     "nov": 11, "november": 11, "novemeber": 11, "novmber": 11,
     "dec": 12, "december": 12, "decmber": 12, "dicember": 12,
-}
+})
 
 def _parse_date(s: str) -> datetime:
     s = s.strip().replace("/", "-")
+    # Fast path for canonical YYYY-MM-DD: skips strptime's format parsing.
+    # Anything else (e.g. 2022-1-5) goes through strptime as before.
+    if len(s) == 10 and s[4] == "-" and s[7] == "-":
+        digits = s[:4] + s[5:7] + s[8:]
+        if digits.isascii() and digits.isdigit():
+            return datetime(int(s[:4]), int(s[5:7]), int(s[8:]))
     return datetime.strptime(s, "%Y-%m-%d")
 
 def validate_date(date_str: str) -> None:
@@ -50,48 +61,64 @@ def validate_range(start: str, end: str) -> None:
     if e <= s:
         raise ValueError("end_date must be AFTER start_date (end_date is exclusive).")
 
-def _get_month_num(word: str) -> int:
-    w = word.lower().strip()
-    if w in MONTH_MAP:
-        return MONTH_MAP[w]
-    if len(w) >= 3:
-        prefix = w[:3]
-        if prefix in MONTH_MAP:
-            return MONTH_MAP[prefix]
-    for key, val in MONTH_MAP.items():
-        if len(key) >= 3 and len(w) >= 3 and key[:3] == w[:3]:
-            return val
-    return 0
+# Every MONTH_MAP key (typos included) agrees with the month of its first three
+# letters, so matching a 3-12 letter word by prefix covers exact and fuzzy hits.
+_MONTH_PREFIXES = {key[:3]: val for key, val in MONTH_MAP.items()}
+MONTH_PREFIX_MAP = MappingProxyType(_MONTH_PREFIXES)
+MONTH_WORD_RE = re.compile(
+    r"\b(" + "|".join(sorted(_MONTH_PREFIXES)) + r")[a-z]{0,9}\b"
+)
 
 def find_months_in_text(text: str) -> List[int]:
+    return _find_months_lower(text.lower())
+
+def _find_months_lower(t: str) -> List[int]:
+    # Plain dict bound locally: the proxy adds a call per lookup.
+    prefixes = _MONTH_PREFIXES
     found = []
-    words = re.findall(r"\b[a-zA-Z]{3,12}\b", text.lower())
-    for word in words:
-        month_num = _get_month_num(word)
-        if month_num > 0 and month_num not in found:
+    for prefix in MONTH_WORD_RE.findall(t):
+        month_num = prefixes[prefix]
+        if month_num not in found:
             found.append(month_num)
     return found
 
-def extract_dates(text: str) -> Tuple[List[datetime], List[str]]:
-    """Return (dates, invalid_dates)."""
-    dates, invalid_dates = [], []
-    found_iso = False
-
-    for y, m, d in ISO_DATE_RE.findall(text):
-        found_iso = True
+def scan_iso_dates(text: str) -> List[Tuple[str, Optional[datetime]]]:
+    """Return (matched text, datetime or None if invalid) for each ISO date, in text order."""
+    found = []
+    for m in ISO_DATE_RE.finditer(text):
         try:
-            dt = datetime(int(y), int(m), int(d))
-            if dt.year == DATASET_YEAR:
-                dates.append(dt)
-            elif int(y) == 2023 and int(m) == 1 and int(d) == 1:
-                dates.append(dt)  # allow exclusive end
+            dt: Optional[datetime] = datetime(int(m[1]), int(m[2]), int(m[3]))
         except ValueError:
-            invalid_dates.append(f"{y}-{m}-{d}")
+            dt = None
+        found.append((m[0], dt))
+    return found
+
+def extract_dates(
+    text: str,
+    iso_dates: Optional[List[Tuple[str, Optional[datetime]]]] = None,
+    lowered: Optional[str] = None,
+) -> Tuple[List[datetime], List[str]]:
+    """Return (dates, invalid_dates).
 
-    if found_iso and (dates or invalid_dates):
+    Pass `iso_dates` from scan_iso_dates and `lowered` (text.lower()) to
+    reuse work the caller has already done.
+    """
+    dates, invalid_dates = [], []
+    if iso_dates is None:
+        iso_dates = scan_iso_dates(text)
+
+    for raw, dt in iso_dates:
+        if dt is None:
+            invalid_dates.append(raw.replace("/", "-"))
+        elif dt.year == DATASET_YEAR:
+            dates.append(dt)
+        elif (dt.year, dt.month, dt.day) == (2023, 1, 1):
+            dates.append(dt)  # allow exclusive end
+
+    if dates or invalid_dates:
         return (sorted(dates), invalid_dates)
 
-    t = text.lower()
+    t = text.lower() if lowered is None else lowered
 
     whole_year = ["whole year", "all of 2022", "entire year", "full year",
                   "all year", "the year", "year 2022"]
@@ -99,11 +126,11 @@ def extract_dates(text: str) -> Tuple[List[datetime], List[str]]:
         return ([datetime(2022, 1, 1), datetime(2023, 1, 1)], [])
 
     if "year" in t and any(w in t for w in ["monthly", "month", "breakdown", "trends", "by"]):
-        if "2022" in t or not re.search(r"\b20\d{2}\b", t):
+        if "2022" in t or not ANY_YEAR_RE.search(t):
             return ([datetime(2022, 1, 1), datetime(2023, 1, 1)], [])
 
     qm = Q_RE.search(t)
-    if qm and ("2022" in t or not re.search(r"\b20\d{2}\b", t)):
+    if qm and ("2022" in t or not ANY_YEAR_RE.search(t)):
         q = int(qm.group(1))
         start_month = (q - 1) * 3 + 1
         end_month = start_month + 3
@@ -111,14 +138,14 @@ def extract_dates(text: str) -> Tuple[List[datetime], List[str]]:
         end = datetime(2022, end_month, 1) if end_month <= 12 else datetime(2023, 1, 1)
         return ([start, end], [])
 
-    for season, (m1, m2) in SEASON_MAP.items():
+    for season, (m1, m2) in _SEASONS:
         if season in t:
-            if re.search(r"\b20(?:1\d|2[013-9])\b", t):
+            if NON_DATASET_YEAR_RE.search(t):
                 return ([], [])
             return ([datetime(2022, m1, 1), datetime(2022, m2, 1)], [])
 
-    found_months = find_months_in_text(t)
-    if found_months and ("2022" in t or not re.search(r"\b20\d{2}\b", t)):
+    found_months = _find_months_lower(t)
+    if found_months and ("2022" in t or not ANY_YEAR_RE.search(t)):
         if len(found_months) == 1:
             m = found_months[0]
             start = datetime(2022, m, 1)
@@ -3,9 +3,14 @@ from __future__ import annotations
 import os
 import json
 import re
-from typing import Any, Dict, Optional
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
 
-from .dates import DATASET_YEAR
+from .dates import DATASET_YEAR, ANY_YEAR_RE
+from .semcache import SemanticCache
 
 ROUTER_SYSTEM_PROMPT = f"""
 You are a routing assistant for an NYC Yellow Taxi dataset (YEAR {DATASET_YEAR} only).
@@ -22,46 +27,155 @@ Output JSON ONLY:
 Return JSON only.
 """.strip()
 
+ROUTE_REWRITE_SYSTEM_PROMPT = f"""
+You rewrite and route user messages for an NYC Yellow Taxi dataset (YEAR {DATASET_YEAR} only).
+Output JSON ONLY:
+{{\"rewritten\": \"clear, analyst-friendly question\", \"intent\": one of [\"trip_frequency\",\"vendor_inactivity\",\"fare_trend\",\"tip_trend\",\"sample_rows\",\"unknown\"], \"dataset_match\": true/false, \"granularity_hint\": \"daily\"|\"weekly\"|\"monthly\"|null, \"metric_hint\": \"avg\"|\"total\"|null}}
+Return JSON only.
+""".strip()
+
+_OTHER_YEAR_RE = re.compile(r"\b20(1\d|2[0134-9])\b")
+_CODE_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$", re.I)
+
+# Parsed LLM answers keyed by (model, prompt kind, normalized user text), so a
+# repeated question skips the network round-trip entirely.
+_LLM_CACHE_SIZE = 512
+_llm_cache: "OrderedDict[Tuple[str, str, str], Dict[str, Any]]" = OrderedDict()
+
+# Paraphrase-level reuse for routing only: rewrites carry concrete dates, so a
+# near-duplicate ("January" vs "February") must not share a rewrite. Caches are
+# scoped by the years mentioned so "trips in 2019" never reuses a 2022 route.
+# Only ask_router consults them (agent_core, and rewrite_and_route's fallback):
+# rewrite_and_route's combined call must produce a fresh rewrite anyway, so a
+# reused route would save it nothing. The CLI and Gradio UI therefore get
+# exact-match reuse only, and never pay for an embedding.
+_route_semcaches: Dict[Tuple[str, ...], SemanticCache] = {}
+
+# Guards both caches: the Gradio UI runs handlers for several sessions on
+# worker threads, and an LRU touch racing an eviction raises KeyError.
+_cache_lock = threading.Lock()
+
+# Stable per-system-prompt key so the provider can reuse the cached prefix.
+_PROMPT_CACHE_KEYS = {
+    "router": hashlib.sha256(ROUTER_SYSTEM_PROMPT.encode()).hexdigest()[:32],
+    "rewrite": hashlib.sha256(REWRITE_SYSTEM_PROMPT.encode()).hexdigest()[:32],
+    "route_rewrite": hashlib.sha256(ROUTE_REWRITE_SYSTEM_PROMPT.encode()).hexdigest()[:32],
+}
+
 def _openai_client() -> Optional[Any]:
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         return None
+    return _shared_openai_client(api_key)
+
+@lru_cache(maxsize=1)
+def _shared_openai_client(api_key: str) -> Optional[Any]:
+    # One client (and connection pool) per process; keyed on the key so a
+    # rotated OPENAI_API_KEY still gets a fresh client.
     try:
         from openai import OpenAI
-        return OpenAI()
+        # Only override the SDK's default request timeout when asked to
+        timeout = os.getenv("SYMBIOTE_OPENAI_TIMEOUT")
+        extra = {"timeout": float(timeout)} if timeout else {}
+        return OpenAI(api_key=api_key, http_client=_http_client(), **extra)
+    except Exception:
+        return None
+
+def _http_client() -> Optional[Any]:
+    # One pooled keep-alive client so turns reuse the TLS connection; HTTP/2
+    # only when the optional h2 package is installed (httpx[http2]).
+    try:
+        import httpx
     except Exception:
         return None
+    try:
+        import h2  # noqa: F401
+        http2 = True
+    except Exception:
+        http2 = False
+    return httpx.Client(
+        http2=http2,
+        limits=httpx.Limits(max_connections=8, max_keepalive_connections=4),
+    )
 
 def _openai_model_name() -> str:
     return os.getenv("SYMBIOTE_MODEL", "gpt-4")
 
+def _openai_embedding_model_name() -> str:
+    return os.getenv("SYMBIOTE_EMBED_MODEL", "text-embedding-3-small")
+
 class _OpenAIModelShim:
     def __init__(self, client: Any):
         self._client = client
+        # None until probed: True = Responses API works, False = use chat only.
+        self._use_responses: Optional[bool] = None
+        # Cleared the first time the SDK rejects the keyword (older openai).
+        self._send_cache_key = True
+        # Same probe for embeddings: None until the first call settles it.
+        self._use_embed: Optional[bool] = None
 
     class _Resp:
         def __init__(self, text: str):
             self.text = text
 
-    def generate_content(self, prompt: str) -> Any:
+    def generate_content(self, prompt: str, cache_key: Optional[str] = None) -> Any:
+        probing = self._use_responses is None
+        if self._use_responses is not False:
+            kwargs = {
+                "model": _openai_model_name(),
+                "reasoning": {"effort": "low"},
+                "temperature": 0,
+                "input": prompt,
+            }
+            if cache_key and self._send_cache_key:
+                kwargs["prompt_cache_key"] = cache_key
+            try:
+                try:
+                    resp = self._client.responses.create(**kwargs)
+                except TypeError:
+                    # SDKs predating prompt_cache_key reject it client-side;
+                    # retry without it rather than abandoning the Responses API
+                    if "prompt_cache_key" not in kwargs:
+                        raise
+                    del kwargs["prompt_cache_key"]
+                    self._send_cache_key = False
+                    resp = self._client.responses.create(**kwargs)
+                self._use_responses = True
+                return self._Resp(resp.output_text or "")
+            except Exception:
+                # Responses is still preferred after this; chat only covers
+                # the turn (a 429/503 or timeout shouldn't lose the answer)
+                pass
         try:
-            resp = self._client.responses.create(
+            resp = self._client.chat.completions.create(
                 model=_openai_model_name(),
-                reasoning={"effort": "low"},
                 temperature=0,
-                input=prompt,
+                messages=[{"role": "user", "content": prompt}],
             )
-            return self._Resp(resp.output_text or "")
         except Exception:
-            try:
-                resp = self._client.chat.completions.create(
-                    model=_openai_model_name(),
-                    temperature=0,
-                    messages=[{"role": "user", "content": prompt}],
-                )
-                return self._Resp(resp.choices[0].message.content or "")
-            except Exception:
-                return self._Resp("")
+            return self._Resp("")
+        # Only pin to chat once chat itself works, so a network blip during the
+        # probe doesn't disable the Responses API for the whole session.
+        if probing:
+            self._use_responses = False
+        return self._Resp(resp.choices[0].message.content or "")
+
+    def embed(self, text: str) -> Optional[list]:
+        if self._use_embed is False:
+            return None
+        try:
+            resp = self._client.embeddings.create(
+                model=_openai_embedding_model_name(),
+                input=text,
+            )
+        except Exception:
+            # An endpoint or model that fails on the first call (proxy without
+            # /embeddings, model not on the account) is not retried every turn
+            if self._use_embed is None:
+                self._use_embed = False
+            return None
+        self._use_embed = True
+        return resp.data[0].embedding
 
 def configure_model() -> Optional[Any]:
     client = _openai_client()
@@ -69,46 +183,124 @@ def configure_model() -> Optional[Any]:
         return None
     return _OpenAIModelShim(client)
 
+def _cache_key(kind: str, user_input: str) -> Tuple[str, str, str]:
+    return (_openai_model_name(), kind, " ".join(user_input.lower().split()))
+
+def _cache_get(key: Tuple[str, str, str]) -> Optional[Dict[str, Any]]:
+    with _cache_lock:
+        hit = _llm_cache.get(key)
+        if hit is None:
+            return None
+        _llm_cache.move_to_end(key)
+    return dict(hit)
+
+def _cache_put(key: Tuple[str, str, str], data: Dict[str, Any]) -> None:
+    with _cache_lock:
+        _llm_cache[key] = dict(data)
+        _llm_cache.move_to_end(key)
+        if len(_llm_cache) > _LLM_CACHE_SIZE:
+            _llm_cache.popitem(last=False)
+
+def clear_llm_cache() -> None:
+    with _cache_lock:
+        _llm_cache.clear()
+        _route_semcaches.clear()
+
+def _embed(model: Any, user_input: str) -> Optional[list]:
+    embed = getattr(model, "embed", None)
+    if embed is None:
+        return None
+    return embed(" ".join(user_input.lower().split()))
+
+def _route_semcache(user_input: str) -> SemanticCache:
+    scope = tuple(sorted(set(ANY_YEAR_RE.findall(user_input))))
+    with _cache_lock:
+        cache = _route_semcaches.get(scope)
+        if cache is None:
+            cache = _route_semcaches[scope] = SemanticCache()
+    return cache
+
+def _generate(model: Any, kind: str, prompt: str) -> Any:
+    if isinstance(model, _OpenAIModelShim):
+        return model.generate_content(prompt, cache_key=_PROMPT_CACHE_KEYS[kind])
+    return model.generate_content(prompt)
+
+# Topic keyword families in routing priority order.
+_TOPIC_KEYWORDS = (
+    ("vendor_inactivity", ("vendor",)),
+    ("tip_trend", ("tip",)),
+    ("fare_trend", ("fare", "price", "expensive", "money", "revenue", "cost")),
+    ("trip_frequency", ("trip", "ride", "busy", "busier", "frequency", "activity", "volume")),
+)
+
+_OUT_OF_SCOPE_WORDS = ("churn", "customer", "cohort", "retention", "subscription")
+_HELP_WORDS = ("help", "what can i ask", "what can i do", "who are you")
+_SAMPLE_WORDS = ("sample", "limit")
+_ROW_WORDS = ("row", "records")
+
+def _contains_any(t: str, words: Tuple[str, ...]) -> bool:
+    # Plain loop: cheaper than any() over a generator for these short tuples.
+    for w in words:
+        if w in t:
+            return True
+    return False
+
 def heuristic_route(user_input: str) -> Dict[str, Any]:
     t = (user_input or "").lower()
 
-    if any(k in t for k in ["churn", "customer", "cohort", "retention", "subscription"]):
+    if _contains_any(t, _OUT_OF_SCOPE_WORDS):
         return {"intent": "unknown", "dataset_match": False}
-    if re.search(r"\b20(1\d|2[0134-9])\b", t) and "2022" not in t:
+    if _OTHER_YEAR_RE.search(t) and "2022" not in t:
         return {"intent": "unknown", "dataset_match": False}
 
-    if any(k in t for k in ["help", "what can i ask", "what can i do", "who are you"]):
+    if _contains_any(t, _HELP_WORDS):
         return {"intent": "unknown", "dataset_match": True}
 
-    if any(k in t for k in ["sample", "show me a sample", "limit"]) and any(k in t for k in ["row", "rows", "records"]):
+    if _contains_any(t, _SAMPLE_WORDS) and _contains_any(t, _ROW_WORDS):
         return {"intent": "sample_rows", "dataset_match": True}
 
-    if "vendor" in t:
-        return {"intent": "vendor_inactivity", "dataset_match": True}
-    if "tip" in t and "strip" not in t:
-        return {"intent": "tip_trend", "dataset_match": True}
-    if any(k in t for k in ["fare", "price", "expensive", "money", "revenue", "cost"]):
-        return {"intent": "fare_trend", "dataset_match": True}
-    if any(k in t for k in ["trip", "trips", "ride", "rides", "busy", "busier",
-                            "frequency", "activity", "volume"]):
-        return {"intent": "trip_frequency", "dataset_match": True}
+    topics = [
+        intent for intent, keywords in _TOPIC_KEYWORDS
+        if _contains_any(t, keywords) and not (intent == "tip_trend" and "strip" in t)
+    ]
+    if topics:
+        # Exactly one topic family is unambiguous enough to skip the LLM.
+        return {
+            "intent": topics[0],
+            "dataset_match": True,
+            "confidence": "high" if len(topics) == 1 else "low",
+        }
 
     return {"intent": "unknown", "dataset_match": True}
 
 def ask_router(model: Any | None, user_input: str) -> Dict[str, Any]:
-    if model is None:
-        return heuristic_route(user_input)
+    heuristic = heuristic_route(user_input)
+    if model is None or heuristic.get("confidence") == "high":
+        return heuristic
+    key = _cache_key("router", user_input)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+    vec = _embed(model, user_input)
+    if vec is not None:
+        similar = _route_semcache(user_input).lookup(vec)
+        if similar is not None:
+            _cache_put(key, similar)
+            return similar
     try:
         prompt = ROUTER_SYSTEM_PROMPT + "\n\nUser request:\n" + user_input
-        response = model.generate_content(prompt)
+        response = _generate(model, "router", prompt)
         text = (response.text or "").strip()
-        text = re.sub(r"^```(?:json)?\s*|\s*```$", "", text, flags=re.I)
+        text = _CODE_FENCE_RE.sub("", text)
         data = json.loads(text)
         if not isinstance(data, dict):
-            return heuristic_route(user_input)
+            return heuristic
+        _cache_put(key, data)
+        if vec is not None:
+            _route_semcache(user_input).add(vec, data)
         return data
     except Exception:
-        return heuristic_route(user_input)
+        return heuristic
 
 def semantic_rewrite(model: Any | None, user_input: str) -> Dict[str, Any]:
     def _fallback():
@@ -117,14 +309,56 @@ def semantic_rewrite(model: Any | None, user_input: str) -> Dict[str, Any]:
 
     if model is None:
         return _fallback()
+    key = _cache_key("rewrite", user_input)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
     try:
         prompt = REWRITE_SYSTEM_PROMPT + "\n\nUser message:\n" + user_input
-        resp = model.generate_content(prompt)
+        resp = _generate(model, "rewrite", prompt)
         text = (resp.text or "").strip()
-        text = re.sub(r"^```(?:json)?\s*|\s*```$", "", text, flags=re.I)
+        text = _CODE_FENCE_RE.sub("", text)
         data = json.loads(text)
         if not isinstance(data, dict) or "rewritten" not in data:
             return _fallback()
+        _cache_put(key, data)
         return data
     except Exception:
         return _fallback()
+
+def rewrite_and_route(model: Any | None, user_input: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Return (semantic_rewrite result, ask_router result) from one LLM call.
+
+    Falls back to the separate rewrite + route calls when the combined
+    answer is missing a required key.
+    """
+    if model is None:
+        rewrite = semantic_rewrite(None, user_input)
+        return rewrite, ask_router(None, (rewrite.get("rewritten") or user_input).strip())
+
+    key = _cache_key("route_rewrite", user_input)
+    data = _cache_get(key)
+    if data is None:
+        try:
+            prompt = ROUTE_REWRITE_SYSTEM_PROMPT + "\n\nUser message:\n" + user_input
+            resp = _generate(model, "route_rewrite", prompt)
+            text = _CODE_FENCE_RE.sub("", (resp.text or "").strip())
+            data = json.loads(text)
+        except Exception:
+            data = None
+        if not isinstance(data, dict) or not all(k in data for k in ("rewritten", "intent", "dataset_match")):
+            rewrite = semantic_rewrite(model, user_input)
+            return rewrite, ask_router(model, (rewrite.get("rewritten") or user_input).strip())
+        _cache_put(key, data)
+
+    rewrite = {
+        "rewritten": data["rewritten"],
+        "intent_hint": data["intent"],
+        "granularity_hint": data.get("granularity_hint"),
+        "metric_hint": data.get("metric_hint"),
+    }
+    # Same short-circuit as ask_router: an unambiguous heuristic wins.
+    heuristic = heuristic_route((data["rewritten"] or user_input).strip())
+    if heuristic.get("confidence") == "high":
+        return rewrite, heuristic
+    return rewrite, {"intent": data["intent"], "dataset_match": data["dataset_match"]}
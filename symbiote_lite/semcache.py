@@ -0,0 +1,74 @@
+"""
+Embedding-similarity cache for LLM answers.
+
+Paraphrases ("trips in jan 2022" / "show January 2022 trips") miss the
+exact-match cache in router.py. This cache returns a stored answer when a
+new question's embedding is close enough (cosine) to a previous one.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_THRESHOLD = 0.93
+DEFAULT_MAX_ENTRIES = 1024
+
+
+class SemanticCache:
+    """
+    In-process cosine-similarity cache.
+
+    Vectors are L2-normalized on insert, so a lookup is one matrix-vector
+    product over the stored (N, D) matrix plus an argmax. A lock keeps the
+    matrix and payload list in step when threads share one cache.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._vectors: Optional[np.ndarray] = None
+        self._payloads: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._payloads)
+
+    @staticmethod
+    def _unit(vec: Sequence[float]) -> np.ndarray:
+        v = np.asarray(vec, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(v))
+        return v / norm if norm else v
+
+    def lookup(self, vec: Sequence[float]) -> Optional[Dict[str, Any]]:
+        """Return a copy of the closest payload if similarity >= threshold."""
+        q = self._unit(vec)
+        with self._lock:
+            if self._vectors is None or q.shape[0] != self._vectors.shape[1]:
+                return None
+            sims = self._vectors @ q
+            best = int(sims.argmax())
+            if sims[best] >= self.threshold:
+                return dict(self._payloads[best])
+        return None
+
+    def add(self, vec: Sequence[float], payload: Dict[str, Any]) -> None:
+        """Store payload under vec, evicting the oldest entry when full."""
+        v = self._unit(vec)[None, :]
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != v.shape[1]:
+                self._vectors = v
+                self._payloads = []
+            else:
+                self._vectors = np.vstack([self._vectors, v])
+            self._payloads.append(dict(payload))
+            if len(self._payloads) > self.max_entries:
+                self._vectors = self._vectors[1:]
+                self._payloads.pop(0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._vectors = None
+            self._payloads = []
@@ -1,10 +1,9 @@
 from __future__ import annotations
 
-import re
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Tuple
 
-from .dates import extract_dates, validate_date, validate_range, recommend_granularity, ISO_DATE_RE
+from .dates import extract_dates, scan_iso_dates, validate_date, validate_range, recommend_granularity, ISO_DATE_RE
 
 REQUIRED_SLOTS = {
     "trip_frequency": ["start_date", "end_date", "granularity"],
@@ -13,7 +12,7 @@ REQUIRED_SLOTS = {
     "tip_trend": ["start_date", "end_date", "granularity", "metric"],
     "sample_rows": ["start_date", "end_date"],
 }
-SUPPORTED_INTENTS = set(REQUIRED_SLOTS)
+SUPPORTED_INTENTS = frozenset(REQUIRED_SLOTS)
 
 def reset_session() -> Dict[str, Any]:
     return {
@@ -80,30 +79,27 @@ def normalize_metric(value: str) -> str:
     raise ValueError("Choose one: avg, total.")
 
 def extract_slots_from_text(state: Dict[str, Any], user_input: str) -> None:
-    dates, invalid_dates = extract_dates(user_input)
+    t = user_input.lower()
+    iso_dates = scan_iso_dates(user_input)
+    dates, invalid_dates = extract_dates(user_input, iso_dates, lowered=t)
     if invalid_dates:
         state["_saw_invalid_iso_date"] = True
         state["_invalid_dates"] = invalid_dates
 
-    # swap notice (only for explicit ISO dates)
-    try:
-        ordered = re.findall(r"\b2022-\d{2}-\d{2}\b", user_input)
-        if len(ordered) >= 2:
-            d0 = datetime.strptime(ordered[0], "%Y-%m-%d")
-            d1 = datetime.strptime(ordered[1], "%Y-%m-%d")
-            if d0 > d1:
-                state["_dates_were_swapped"] = True
-                state["_swapped_from"] = ordered[0]
-                state["_swapped_to"] = ordered[1]
-    except Exception:
-        pass
+    # swap notice (only for explicit YYYY-MM-DD dates in 2022, in typed order)
+    ordered = [(raw, dt) for raw, dt in iso_dates if raw.startswith("2022-") and "/" not in raw]
+    if len(ordered) >= 2:
+        (raw0, d0), (raw1, d1) = ordered[0], ordered[1]
+        if d0 is not None and d1 is not None and d0 > d1:
+            state["_dates_were_swapped"] = True
+            state["_swapped_from"] = raw0
+            state["_swapped_to"] = raw1
 
     if len(dates) >= 1 and state.get("start_date") is None:
         state["start_date"] = dates[0]
     if len(dates) >= 2 and state.get("end_date") is None:
         state["end_date"] = dates[1]
 
-    t = user_input.lower()
     if state.get("granularity") is None:
         if any(w in t for w in ["monthly", "by month", "per month"]):
             state["granularity"] = "monthly"
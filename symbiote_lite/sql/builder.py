@@ -7,7 +7,12 @@ def _date_to_str(d: Any) -> str:
     if isinstance(d, datetime):
         return d.strftime("%Y-%m-%d")
     if isinstance(d, str):
-        # Expected YYYY-MM-DD
+        # Expected YYYY-MM-DD; canonical input is validated and returned as-is
+        if len(d) == 10 and d[4] == "-" and d[7] == "-":
+            digits = d[:4] + d[5:7] + d[8:]
+            if digits.isascii() and digits.isdigit():
+                datetime(int(d[:4]), int(d[5:7]), int(d[8:]))
+                return d
         return datetime.strptime(d, "%Y-%m-%d").strftime("%Y-%m-%d")
     raise TypeError("start_date/end_date must be datetime or YYYY-MM-DD string")
 
@@ -18,37 +23,60 @@ def time_bucket(granularity: str) -> Tuple[str, str]:
         return "STRFTIME('%Y-%W', pickup_datetime)", "week"
     return "STRFTIME('%Y-%m', pickup_datetime)", "month"
 
-def build_sql(state: dict, intent: str) -> str:
-    sd = _date_to_str(state["start_date"])
-    ed = _date_to_str(state["end_date"])
-
+def _sql_template(intent: str, granularity: Optional[str], agg: str, col: str) -> str:
     if intent == "trip_frequency":
-        expr, label = time_bucket(state["granularity"])
+        expr, label = time_bucket(granularity)
         return f"""SELECT {expr} AS {label}, COUNT(*) AS trips
 FROM taxi_trips
-WHERE pickup_datetime >= '{sd}'
-  AND pickup_datetime < '{ed}'
+WHERE pickup_datetime >= ?
+  AND pickup_datetime < ?
 GROUP BY 1
 ORDER BY 1;"""
 
     if intent == "sample_rows":
-        limit = int(state.get("limit") or 100)
-        limit = max(1, min(limit, 1000))
-        return f"""SELECT pickup_datetime, dropoff_datetime, vendor_id, fare_amount, tip_amount, total_amount
+        return """SELECT pickup_datetime, dropoff_datetime, vendor_id, fare_amount, tip_amount, total_amount
 FROM taxi_trips
-WHERE pickup_datetime >= '{sd}'
-  AND pickup_datetime < '{ed}'
+WHERE pickup_datetime >= ?
+  AND pickup_datetime < ?
 ORDER BY pickup_datetime
-LIMIT {limit};"""
+LIMIT ?;"""
 
     if intent == "vendor_inactivity":
-        return f"""SELECT vendor_id, COUNT(*) AS trips
+        return """SELECT vendor_id, COUNT(*) AS trips
 FROM taxi_trips
-WHERE pickup_datetime >= '{sd}'
-  AND pickup_datetime < '{ed}'
+WHERE pickup_datetime >= ?
+  AND pickup_datetime < ?
 GROUP BY vendor_id
 ORDER BY trips ASC;"""
 
+    expr, label = time_bucket(granularity)
+    return f"""SELECT {expr} AS {label}, {agg}({col}) AS value
+FROM taxi_trips
+WHERE pickup_datetime >= ?
+  AND pickup_datetime < ?
+GROUP BY 1
+ORDER BY 1;"""
+
+def build_sql_params(state: dict, intent: str) -> Tuple[str, Tuple[Any, ...]]:
+    """Return (sql_template, params) with dates/limit bound via `?` placeholders.
+
+    The template text depends only on intent/granularity/metric, so SQLite's
+    per-connection statement cache can reuse the compiled plan across calls.
+    """
+    sd = _date_to_str(state["start_date"])
+    ed = _date_to_str(state["end_date"])
+
+    if intent == "sample_rows":
+        limit = int(state.get("limit") or 100)
+        limit = max(1, min(limit, 1000))
+        return _sql_template(intent, None, "", ""), (sd, ed, limit)
+
+    if intent == "trip_frequency":
+        return _sql_template(intent, state["granularity"], "", ""), (sd, ed)
+
+    if intent == "vendor_inactivity":
+        return _sql_template(intent, None, "", ""), (sd, ed)
+
     col = "fare_amount" if intent == "fare_trend" else "tip_amount"
     if intent == "fare_trend":
         pp = state.get("_postprocess") or {}
@@ -56,10 +84,29 @@ ORDER BY trips ASC;"""
             col = "total_amount"
 
     agg = "SUM" if state["metric"] == "total" else "AVG"
-    expr, label = time_bucket(state["granularity"])
-    return f"""SELECT {expr} AS {label}, {agg}({col}) AS value
-FROM taxi_trips
-WHERE pickup_datetime >= '{sd}'
-  AND pickup_datetime < '{ed}'
-GROUP BY 1
-ORDER BY 1;"""
+    return _sql_template(intent, state["granularity"], agg, col), (sd, ed)
+
+# Every template build_sql_params can emit. Values are always bound, never
+# inlined, so membership proves a statement is a known read-only SELECT and
+# the executor can skip the keyword scan it runs on arbitrary SQL.
+SAFE_TEMPLATES = frozenset(
+    _sql_template(intent, granularity, agg, col)
+    for intent in ("trip_frequency", "sample_rows", "vendor_inactivity", "fare_trend", "tip_trend")
+    for granularity in ("daily", "weekly", "monthly")
+    for agg in ("SUM", "AVG")
+    for col in ("fare_amount", "tip_amount", "total_amount")
+)
+
+def render_sql(template: str, params: Tuple[Any, ...]) -> str:
+    """Inline params into a template for display (approval gate, MCP payloads)."""
+    parts = template.split("?")
+    if len(parts) != len(params) + 1:
+        raise ValueError("Parameter count does not match SQL template.")
+    out = [parts[0]]
+    for value, tail in zip(params, parts[1:]):
+        out.append(str(value) if isinstance(value, int) else f"'{value}'")
+        out.append(tail)
+    return "".join(out)
+
+def build_sql(state: dict, intent: str) -> str:
+    return render_sql(*build_sql_params(state, intent))
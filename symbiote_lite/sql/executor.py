@@ -2,9 +2,26 @@ from __future__ import annotations
 
 import os
 import sqlite3
+import threading
 from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
 import pandas as pd
 
+# sqlite3 keeps an LRU of compiled statements per connection, keyed by SQL text.
+# Reusing one connection per (thread, db file) lets parameterized templates from
+# build_sql_params skip parse/plan after their first execution.
+_STATEMENT_CACHE_SIZE = 128
+_local = threading.local()
+
+# Per-connection read tuning: 128 MiB page cache, in-memory temp B-trees for
+# GROUP BY/ORDER BY, and 256 MiB mmap so page reads skip the read() syscall.
+# journal_mode/synchronous persist in the file and are set by the DB builders.
+_READ_PRAGMAS = (
+    "PRAGMA cache_size=-131072",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
+
 def _default_db_path() -> Path:
     # Allow override for Docker/CI
     env = os.getenv("SYMBIOTE_DB_PATH")
@@ -13,7 +30,31 @@ def _default_db_path() -> Path:
     # project_root/data/taxi_trips.sqlite (project_root = .../symbiote-lite/)
     return Path(__file__).resolve().parents[2] / "data" / "taxi_trips.sqlite"
 
-def execute_sql_query(sql: str, db_path: Path | None = None) -> pd.DataFrame:
+def _get_connection(path: Path) -> sqlite3.Connection:
+    conns: Dict[Tuple[str, int], sqlite3.Connection] = getattr(_local, "conns", None) or {}
+    _local.conns = conns
+    # Key on inode too so a rebuilt DB file (make db-reset) gets a fresh connection.
+    key = (str(path), path.stat().st_ino)
+    conn = conns.get(key)
+    if conn is None:
+        conn = sqlite3.connect(str(path), cached_statements=_STATEMENT_CACHE_SIZE)
+        for pragma in _READ_PRAGMAS:
+            conn.execute(pragma)
+        conns[key] = conn
+    return conn
+
+def close_connections() -> None:
+    """Close this thread's cached connections (drops their statement caches)."""
+    conns = getattr(_local, "conns", None) or {}
+    for conn in conns.values():
+        conn.close()
+    conns.clear()
+
+def execute_sql_query(
+    sql: str,
+    db_path: Path | None = None,
+    params: Optional[Sequence[Any]] = None,
+) -> pd.DataFrame:
     """Execute a SELECT-only query against the configured SQLite DB and return a DataFrame."""
     path = (db_path or _default_db_path())
     if not path.exists():
@@ -21,5 +62,5 @@ def execute_sql_query(sql: str, db_path: Path | None = None) -> pd.DataFrame:
             f"SQLite DB not found at: {path}. "
             "Set SYMBIOTE_DB_PATH or place the DB at ./data/taxi_trips.sqlite"
         )
-    with sqlite3.connect(str(path)) as conn:
-        return pd.read_sql_query(sql, conn)
+    conn = _get_connection(path)
+    return pd.read_sql_query(sql, conn, params=tuple(params) if params else None)
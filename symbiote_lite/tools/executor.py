@@ -9,7 +9,10 @@ This layer is intentionally:
 This is the MCP BOUNDARY - all tool execution goes through here.
 """
 
+from typing import Any, Optional, Sequence
+
 import pandas as pd
+from symbiote_lite.sql.builder import SAFE_TEMPLATES
 from symbiote_lite.sql.executor import execute_sql_query
 from symbiote_lite.sql.safety import safe_select_only
 
@@ -27,21 +30,24 @@ class DirectToolExecutor:
     The agent NEVER executes SQL directly - it always goes through this executor.
     """
 
-    def execute_sql(self, sql: str) -> dict:
+    def execute_sql(self, sql: str, params: Optional[Sequence[Any]] = None) -> dict:
         """
         Execute a safe SELECT-only SQL query.
 
         Args:
             sql: SQL query string (must be SELECT-only)
+            params: Optional values bound to `?` placeholders in sql
 
         Returns:
             dict with success, rows, columns, row_count, dataframe
         """
-        # 1. Safety check (raises ValueError if unsafe)
-        safe_select_only(sql)
+        # 1. Safety check (raises ValueError if unsafe); builder templates
+        #    are a closed, parameterized set and need no scan
+        if sql not in SAFE_TEMPLATES:
+            safe_select_only(sql)
 
         # 2. Execute via the low-level executor
-        df = execute_sql_query(sql)
+        df = execute_sql_query(sql, params=params)
 
         # 3. Return structured result (MCP-style)
         return {
@@ -74,6 +74,13 @@ class TestAgentHelpers:
         assert detect_unsupported_query("show trips in january") is None
         assert detect_unsupported_query("fare trends by week") is None
 
+    def test_detect_unsupported_query_uses_list_order(self):
+        """A message hitting two categories gets the first listed explanation."""
+        from symbiote_lite.agent import detect_unsupported_query
+
+        assert "Hourly" in detect_unsupported_query("trips by zone at night")
+        assert "Hourly" in detect_unsupported_query("payment by hour")
+
     def test_detect_multi_topic(self):
         """Test multi-topic detection."""
         from symbiote_lite.agent import detect_multi_topic
@@ -0,0 +1,78 @@
+"""
+Tests for the legacy agent's on-disk result cache (scripts/Other/analysis.py).
+Skipped unless pyarrow is installed.
+"""
+import sqlite3
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from scripts.Other import analysis
+
+
+@pytest.fixture
+def taxi_db(tmp_path, monkeypatch):
+    """Point analysis at a small taxi.db and an empty result cache."""
+    db_path = tmp_path / "taxi.db"
+    conn = sqlite3.connect(str(db_path))
+    conn.execute(
+        "CREATE TABLE taxi_trips (pickup_datetime TEXT, vendor_id INTEGER, fare_amount REAL)"
+    )
+    conn.executemany(
+        "INSERT INTO taxi_trips VALUES (?, ?, ?)",
+        [("2022-01-01 08:00:00", 1, 12.5), ("2022-01-02 09:00:00", 2, 7.25)],
+    )
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(analysis, "DB_PATH", db_path)
+    monkeypatch.setattr(analysis, "RESULT_CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(analysis, "_DISK_CACHE", True)
+    analysis._cached_query.cache_clear()
+    analysis._disk_cache_dir.cache_clear()
+    yield db_path
+    analysis._cached_query.cache_clear()
+    analysis._disk_cache_dir.cache_clear()
+
+
+SQL = "SELECT pickup_datetime, vendor_id, fare_amount FROM taxi_trips ORDER BY pickup_datetime"
+
+
+def _feather_files(tmp_path):
+    return list((tmp_path / "cache").glob("*/*.feather"))
+
+
+class TestDiskCache:
+    """Test the Feather result cache."""
+
+    def test_round_trip_preserves_dtypes(self, taxi_db, tmp_path):
+        """Test a result read back from disk equals the original."""
+        first = analysis.execute_sql_query(SQL)
+        assert len(_feather_files(tmp_path)) == 1
+        # Drop the in-memory layer so the next call reads the file
+        analysis._cached_query.cache_clear()
+        second = analysis.execute_sql_query(SQL)
+        pd.testing.assert_frame_equal(first, second)
+
+    def test_corrupt_file_is_replaced(self, taxi_db, tmp_path):
+        """Test an unreadable cache file is rewritten from the DB."""
+        expected = analysis.execute_sql_query(SQL)
+        (path,) = _feather_files(tmp_path)
+        path.write_bytes(b"not feather")
+        analysis._cached_query.cache_clear()
+        pd.testing.assert_frame_equal(analysis.execute_sql_query(SQL), expected)
+        pd.testing.assert_frame_equal(pd.read_feather(path), expected)
+
+    def test_old_builds_pruned(self, taxi_db, tmp_path):
+        """Test results for a previous DB build are removed."""
+        analysis.execute_sql_query(SQL)
+        (old_dir,) = {p.parent for p in _feather_files(tmp_path)}
+        # A new build gets a new (path, inode, mtime) key
+        taxi_db.unlink()
+        conn = sqlite3.connect(str(taxi_db))
+        conn.execute("CREATE TABLE taxi_trips (pickup_datetime TEXT, vendor_id INTEGER, fare_amount REAL)")
+        conn.close()
+        analysis.execute_sql_query(SQL)
+        assert not old_dir.exists()
+        assert len(_feather_files(tmp_path)) == 1
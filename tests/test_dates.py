@@ -196,6 +196,15 @@ class TestFindMonthsInText:
         assert 2 in months
         assert 3 in months
 
+    def test_find_months_preserves_order(self):
+        """Test months are returned once, in order of appearance."""
+        months = find_months_in_text("march vs janury, then march again")
+        assert months == [3, 1]
+
+    def test_find_unlisted_misspelling(self):
+        """Test misspellings sharing a month prefix still match."""
+        assert find_months_in_text("febrauary") == [2]
+
     def test_no_months(self):
         """Test when no months found."""
         months = find_months_in_text("show me data")
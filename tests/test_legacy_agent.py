@@ -0,0 +1,61 @@
+"""
+Tests for the legacy CLI agent (scripts/Other/symbiote_lite_agent.py).
+Covers import-time cost and schema detection.
+"""
+import importlib
+import os
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+
+class TestLegacyAgentImport:
+    """Test the legacy agent stays cheap to import."""
+
+    def test_import_skips_numpy_and_pandas(self):
+        """Test importing the module loads neither numpy nor pandas."""
+        # Fresh interpreter: this test process has already imported both
+        code = (
+            "import sys, scripts.Other.symbiote_lite_agent\n"
+            "print(sorted(m for m in ('numpy', 'pandas') if m in sys.modules))\n"
+        )
+        env = dict(os.environ, SYMBIOTE_SKIP_DOTENV="1")
+        out = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=Path(__file__).parent.parent,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        assert out.stdout.strip() == "[]"
+
+
+class TestLegacyTimeBucket:
+    """Test time_bucket against old and new taxi.db builds."""
+
+    def _agent(self, monkeypatch, tmp_path, columns):
+        db_path = tmp_path / "taxi.db"
+        conn = sqlite3.connect(str(db_path))
+        conn.execute(f"CREATE TABLE taxi_trips (pickup_datetime TEXT{columns})")
+        conn.close()
+        monkeypatch.setenv("SYMBIOTE_SKIP_DOTENV", "1")
+        analysis = importlib.import_module("scripts.Other.analysis")
+        monkeypatch.setattr(analysis, "DB_PATH", db_path)
+        return importlib.import_module("scripts.Other.symbiote_lite_agent")
+
+    def test_uses_materialized_columns(self, monkeypatch, tmp_path):
+        """Test a current build groups on the bucket columns."""
+        agent = self._agent(
+            monkeypatch, tmp_path,
+            ", pickup_day TEXT, pickup_week TEXT, pickup_month TEXT",
+        )
+        assert agent.time_bucket("daily") == ("pickup_day", "day")
+        assert agent.time_bucket("monthly") == ("pickup_month", "month")
+
+    def test_old_build_falls_back_to_expressions(self, monkeypatch, tmp_path):
+        """Test a taxi.db without bucket columns still gets valid SQL."""
+        agent = self._agent(monkeypatch, tmp_path, "")
+        assert agent.time_bucket("daily") == ("DATE(pickup_datetime)", "day")
+        assert agent.time_bucket("weekly") == ("STRFTIME('%Y-%W', pickup_datetime)", "week")
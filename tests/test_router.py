@@ -9,9 +9,28 @@ from symbiote_lite.router import (
     ask_router,
     semantic_rewrite,
     configure_model,
+    clear_llm_cache,
+    rewrite_and_route,
+    _OpenAIModelShim,
 )
 
 
+class _CountingModel:
+    """Fake LLM that returns a fixed JSON payload and counts calls."""
+
+    class _Resp:
+        def __init__(self, text):
+            self.text = text
+
+    def __init__(self, text):
+        self.text = text
+        self.calls = 0
+
+    def generate_content(self, prompt):
+        self.calls += 1
+        return self._Resp(self.text)
+
+
 class TestHeuristicRoute:
     """Test heuristic routing without LLM."""
 
@@ -145,6 +164,293 @@ class TestSemanticRewrite:
         assert r["rewritten"] == original
 
 
+class TestLLMCache:
+    """Test caching of parsed LLM answers."""
+
+    @pytest.fixture(autouse=True)
+    def _clear(self):
+        clear_llm_cache()
+        yield
+        clear_llm_cache()
+
+    def test_router_cache_hit_on_normalized_input(self):
+        """Test repeated questions differing in case/spacing reuse the answer."""
+        model = _CountingModel('{"intent": "fare_trend", "dataset_match": true}')
+        first = ask_router(model, "How did Q1 look")
+        second = ask_router(model, "  how did q1   LOOK ")
+        assert first == second == {"intent": "fare_trend", "dataset_match": True}
+        assert model.calls == 1
+
+    def test_rewrite_cache_separate_from_router(self):
+        """Test router and rewrite answers are cached independently."""
+        model = _CountingModel('{"rewritten": "trips in jan", "intent": "trip_frequency"}')
+        semantic_rewrite(model, "jan overview")
+        ask_router(model, "jan overview")
+        semantic_rewrite(model, "jan overview")
+        assert model.calls == 2
+
+    def test_invalid_answer_not_cached(self):
+        """Test fallbacks from unparseable answers are not cached."""
+        model = _CountingModel("not json")
+        r1 = ask_router(model, "what about march")
+        r2 = ask_router(model, "what about march")
+        assert r1["intent"] == r2["intent"] == "unknown"
+        assert model.calls == 2
+
+    def test_cached_result_is_a_copy(self):
+        """Test callers cannot mutate the cached entry."""
+        model = _CountingModel('{"intent": "tip_trend", "dataset_match": true}')
+        ask_router(model, "q1 summary")["intent"] = "mutated"
+        assert ask_router(model, "q1 summary")["intent"] == "tip_trend"
+
+
+class TestHeuristicShortCircuit:
+    """Test unambiguous questions skip the LLM."""
+
+    @pytest.fixture(autouse=True)
+    def _clear(self):
+        clear_llm_cache()
+        yield
+        clear_llm_cache()
+
+    def test_single_topic_is_high_confidence(self):
+        """Test one keyword family yields high confidence."""
+        assert heuristic_route("which vendors were inactive")["confidence"] == "high"
+        assert heuristic_route("average fares in march")["confidence"] == "high"
+
+    def test_mixed_topics_are_low_confidence(self):
+        """Test competing keyword families defer to the LLM."""
+        r = heuristic_route("tip money per trip")
+        assert r["intent"] == "tip_trend"
+        assert r["confidence"] == "low"
+
+    def test_high_confidence_skips_model(self):
+        """Test the model is never called for an unambiguous question."""
+        model = _CountingModel('{"intent": "trip_frequency", "dataset_match": true}')
+        assert ask_router(model, "show tip trends")["intent"] == "tip_trend"
+        assert model.calls == 0
+
+    def test_low_confidence_calls_model(self):
+        """Test ambiguous questions still go to the model."""
+        model = _CountingModel('{"intent": "fare_trend", "dataset_match": true}')
+        assert ask_router(model, "fare per trip")["intent"] == "fare_trend"
+        assert model.calls == 1
+
+
+class TestRewriteAndRoute:
+    """Test the combined rewrite + route call."""
+
+    @pytest.fixture(autouse=True)
+    def _clear(self):
+        clear_llm_cache()
+        yield
+        clear_llm_cache()
+
+    def test_no_model_uses_heuristics(self):
+        """Test the offline path still rewrites and routes."""
+        rewrite, route = rewrite_and_route(None, "show trips in january 2022")
+        assert rewrite["rewritten"] == "show trips in january 2022"
+        assert route["intent"] == "trip_frequency"
+
+    def test_single_call_for_both(self):
+        """Test one model call yields the rewrite and the route."""
+        model = _CountingModel(
+            '{"rewritten": "How did Q1 2022 look overall?", "intent": "trip_frequency",'
+            ' "dataset_match": true, "granularity_hint": "weekly", "metric_hint": null}'
+        )
+        rewrite, route = rewrite_and_route(model, "how did q1 look")
+        assert rewrite["rewritten"] == "How did Q1 2022 look overall?"
+        assert rewrite["granularity_hint"] == "weekly"
+        assert route == {"intent": "trip_frequency", "dataset_match": True}
+        assert model.calls == 1
+
+    def test_repeat_served_from_cache(self):
+        """Test a repeated message makes no further calls."""
+        model = _CountingModel(
+            '{"rewritten": "Q1 overview", "intent": "unknown", "dataset_match": true}'
+        )
+        rewrite_and_route(model, "how did q1 look")
+        rewrite_and_route(model, "How did Q1 look")
+        assert model.calls == 1
+
+    def test_incomplete_answer_falls_back(self):
+        """Test a combined answer missing keys falls back to separate calls."""
+        model = _CountingModel('{"rewritten": "Q1 overview"}')
+        rewrite, _ = rewrite_and_route(model, "how did q1 look")
+        assert rewrite["rewritten"] == "Q1 overview"
+        assert model.calls == 3
+
+
+class _EmbeddingModel(_CountingModel):
+    """Fake LLM with embeddings looked up from a fixed table."""
+
+    def __init__(self, text, vectors):
+        super().__init__(text)
+        self.vectors = vectors
+
+    def embed(self, text):
+        return self.vectors.get(text)
+
+
+class TestSemanticRouteCache:
+    """Test paraphrase reuse of router answers via embeddings."""
+
+    @pytest.fixture(autouse=True)
+    def _clear(self):
+        clear_llm_cache()
+        yield
+        clear_llm_cache()
+
+    def test_paraphrase_reuses_route(self):
+        """Test a near-identical embedding skips the LLM."""
+        model = _EmbeddingModel(
+            '{"intent": "fare_trend", "dataset_match": true}',
+            {"how did q1 go": [1.0, 0.0, 0.1], "how was q1": [1.0, 0.0, 0.12]},
+        )
+        first = ask_router(model, "how did q1 go")
+        second = ask_router(model, "how was q1")
+        assert first == second
+        assert model.calls == 1
+
+    def test_dissimilar_query_calls_llm(self):
+        """Test embeddings below the threshold miss."""
+        model = _EmbeddingModel(
+            '{"intent": "fare_trend", "dataset_match": true}',
+            {"how did q1 go": [1.0, 0.0], "summarize december": [0.0, 1.0]},
+        )
+        ask_router(model, "how did q1 go")
+        ask_router(model, "summarize december")
+        assert model.calls == 2
+
+    def test_different_year_not_reused(self):
+        """Test a paraphrase naming another year is routed afresh."""
+        model = _EmbeddingModel(
+            '{"intent": "trip_frequency", "dataset_match": true}',
+            {"what happened in 2022": [1.0, 0.0], "what happened in 2019": [1.0, 0.0]},
+        )
+        ask_router(model, "what happened in 2022")
+        ask_router(model, "what happened in 2019")
+        assert model.calls == 2
+
+    def test_rewrite_not_semantically_cached(self):
+        """Test rewrites only reuse exact matches (they carry dates)."""
+        model = _EmbeddingModel(
+            '{"rewritten": "trips in january 2022", "intent": "trip_frequency"}',
+            {"trips jan": [1.0, 0.0], "trips feb": [1.0, 0.0]},
+        )
+        semantic_rewrite(model, "trips jan")
+        semantic_rewrite(model, "trips feb")
+        assert model.calls == 2
+
+
+class _FakeOpenAIClient:
+    """Fake OpenAI client whose Responses and embeddings APIs can be made to fail."""
+
+    def __init__(self, responses_ok, accepts_cache_key=True, embeddings_ok=True):
+        self.responses_ok = responses_ok
+        self.embeddings_ok = embeddings_ok
+        self.embed_calls = 0
+        self.accepts_cache_key = accepts_cache_key
+        self.fail_on = ()
+        self.responses_kwargs = []
+        self.responses_calls = 0
+        self.chat_calls = 0
+        client = self
+
+        class _Responses:
+            def create(self, **kwargs):
+                client.responses_calls += 1
+                client.responses_kwargs.append(kwargs)
+                if "prompt_cache_key" in kwargs and not client.accepts_cache_key:
+                    raise TypeError("unexpected keyword argument 'prompt_cache_key'")
+                if not client.responses_ok:
+                    raise RuntimeError("unsupported")
+                if client.responses_calls in client.fail_on:
+                    raise RuntimeError("503 service unavailable")
+                return type("R", (), {"output_text": "responses"})()
+
+        class _Completions:
+            def create(self, **kwargs):
+                client.chat_calls += 1
+                msg = type("M", (), {"content": "chat"})()
+                choice = type("C", (), {"message": msg})()
+                return type("R", (), {"choices": [choice]})()
+
+        class _Embeddings:
+            def create(self, **kwargs):
+                client.embed_calls += 1
+                if not client.embeddings_ok:
+                    raise RuntimeError("404 not found")
+                item = type("E", (), {"embedding": [1.0, 0.0]})()
+                return type("R", (), {"data": [item]})()
+
+        self.responses = _Responses()
+        self.embeddings = _Embeddings()
+        self.chat = type("Chat", (), {"completions": _Completions()})()
+
+
+class TestOpenAIModelShim:
+    """Test endpoint capability probing."""
+
+    def test_responses_used_when_supported(self):
+        """Test the Responses API is used and chat never called."""
+        client = _FakeOpenAIClient(responses_ok=True)
+        shim = _OpenAIModelShim(client)
+        assert shim.generate_content("a").text == "responses"
+        assert shim.generate_content("b").text == "responses"
+        assert client.chat_calls == 0
+
+    def test_unsupported_responses_probed_once(self):
+        """Test a failing Responses API is not retried every turn."""
+        client = _FakeOpenAIClient(responses_ok=False)
+        shim = _OpenAIModelShim(client)
+        for _ in range(3):
+            assert shim.generate_content("q").text == "chat"
+        assert client.responses_calls == 1
+        assert client.chat_calls == 3
+
+    def test_transient_responses_error_falls_back_to_chat(self):
+        """Test a later Responses failure is answered by chat and not pinned."""
+        client = _FakeOpenAIClient(responses_ok=True)
+        client.fail_on = (2,)
+        shim = _OpenAIModelShim(client)
+        assert shim.generate_content("a").text == "responses"
+        assert shim.generate_content("b").text == "chat"
+        assert shim.generate_content("c").text == "responses"
+        assert client.responses_calls == 3
+        assert client.chat_calls == 1
+
+    def test_unsupported_embeddings_probed_once(self):
+        """Test a failing embeddings endpoint is not retried every turn."""
+        client = _FakeOpenAIClient(responses_ok=True, embeddings_ok=False)
+        shim = _OpenAIModelShim(client)
+        for _ in range(3):
+            assert shim.embed("q") is None
+        assert client.embed_calls == 1
+
+    def test_transient_embeddings_error_not_pinned(self):
+        """Test a failure after a working embeddings call is retried next turn."""
+        client = _FakeOpenAIClient(responses_ok=True)
+        shim = _OpenAIModelShim(client)
+        assert shim.embed("a") == [1.0, 0.0]
+        client.embeddings_ok = False
+        assert shim.embed("b") is None
+        client.embeddings_ok = True
+        assert shim.embed("c") == [1.0, 0.0]
+        assert client.embed_calls == 3
+
+    def test_old_sdk_without_prompt_cache_key(self):
+        """Test an SDK rejecting prompt_cache_key keeps the Responses API."""
+        client = _FakeOpenAIClient(responses_ok=True, accepts_cache_key=False)
+        shim = _OpenAIModelShim(client)
+        assert shim.generate_content("a", cache_key="k").text == "responses"
+        assert shim.generate_content("b", cache_key="k").text == "responses"
+        assert client.chat_calls == 0
+        # One rejected call, then the keyword is no longer sent
+        assert client.responses_calls == 3
+        assert "prompt_cache_key" not in client.responses_kwargs[-1]
+
+
 class TestConfigureModel:
     """Test model configuration."""
 
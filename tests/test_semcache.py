@@ -0,0 +1,63 @@
+"""
+Tests for the semantic cache module.
+Covers cosine matching, thresholds, and eviction.
+"""
+from symbiote_lite.semcache import SemanticCache
+
+
+class TestSemanticCache:
+    """Test embedding-similarity lookups."""
+
+    def test_empty_cache_misses(self):
+        """Test lookup on an empty cache returns None."""
+        assert SemanticCache().lookup([1.0, 0.0]) is None
+
+    def test_similar_vector_hits(self):
+        """Test a vector above the threshold returns the payload."""
+        cache = SemanticCache(threshold=0.9)
+        cache.add([1.0, 0.0], {"intent": "fare_trend"})
+        assert cache.lookup([2.0, 0.1]) == {"intent": "fare_trend"}
+
+    def test_dissimilar_vector_misses(self):
+        """Test a vector below the threshold misses."""
+        cache = SemanticCache(threshold=0.9)
+        cache.add([1.0, 0.0], {"intent": "fare_trend"})
+        assert cache.lookup([0.0, 1.0]) is None
+
+    def test_best_match_wins(self):
+        """Test the closest stored vector is returned."""
+        cache = SemanticCache(threshold=0.5)
+        cache.add([1.0, 0.0], {"intent": "a"})
+        cache.add([0.7, 0.7], {"intent": "b"})
+        assert cache.lookup([0.6, 0.8])["intent"] == "b"
+
+    def test_dimension_mismatch_misses(self):
+        """Test a vector of another dimension never matches."""
+        cache = SemanticCache()
+        cache.add([1.0, 0.0], {"intent": "a"})
+        assert cache.lookup([1.0, 0.0, 0.0]) is None
+
+    def test_oldest_entry_evicted(self):
+        """Test max_entries evicts in insertion order."""
+        cache = SemanticCache(threshold=0.99, max_entries=2)
+        cache.add([1.0, 0.0, 0.0], {"intent": "a"})
+        cache.add([0.0, 1.0, 0.0], {"intent": "b"})
+        cache.add([0.0, 0.0, 1.0], {"intent": "c"})
+        assert len(cache) == 2
+        assert cache.lookup([1.0, 0.0, 0.0]) is None
+        assert cache.lookup([0.0, 0.0, 1.0])["intent"] == "c"
+
+    def test_payload_is_copied(self):
+        """Test callers cannot mutate stored payloads."""
+        cache = SemanticCache()
+        cache.add([1.0], {"intent": "a"})
+        cache.lookup([1.0])["intent"] = "mutated"
+        assert cache.lookup([1.0])["intent"] == "a"
+
+    def test_clear(self):
+        """Test clear drops all entries."""
+        cache = SemanticCache()
+        cache.add([1.0], {"intent": "a"})
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.lookup([1.0]) is None
@@ -88,6 +88,20 @@ class TestExtractSlotsFromText:
         extract_slots_from_text(state, "from 2022-06-01 to 2022-03-01")
         assert state["_dates_were_swapped"] is True
 
+    def test_extract_swapped_dates_records_typed_order(self):
+        """Test the swap notice keeps the dates in the order typed."""
+        state = reset_session()
+        extract_slots_from_text(state, "from 2022-06-01 to 2022-03-01")
+        assert state["_swapped_from"] == "2022-06-01"
+        assert state["_swapped_to"] == "2022-03-01"
+        assert state["start_date"] == datetime(2022, 3, 1)
+
+    def test_extract_swap_ignores_invalid_dates(self):
+        """Test an invalid date never triggers the swap notice."""
+        state = reset_session()
+        extract_slots_from_text(state, "from 2022-06-01 to 2022-02-30")
+        assert state["_dates_were_swapped"] is False
+
     def test_extract_invalid_dates_detected(self):
         """Test invalid dates are flagged."""
         state = reset_session()
@@ -5,7 +5,7 @@ Covers SQL generation for all intent types.
 from datetime import datetime
 import pytest
 
-from symbiote_lite.sql.builder import build_sql, time_bucket
+from symbiote_lite.sql.builder import build_sql, build_sql_params, render_sql, time_bucket, SAFE_TEMPLATES
 
 
 class TestTimeBucket:
@@ -228,3 +228,89 @@ class TestSQLSafety:
         
         # Dates should be quoted strings
         assert "'>= '2022-01-01'" in sql or ">= '2022-01-01'" in sql
+
+
+class TestBuildSQLParams:
+    """Test parameterized SQL templates."""
+
+    def test_dates_bound_as_params(self):
+        """Test dates are bound via placeholders, not inlined."""
+        state = {
+            "start_date": datetime(2022, 1, 1),
+            "end_date": datetime(2022, 2, 1),
+            "granularity": "daily",
+        }
+        template, params = build_sql_params(state, "trip_frequency")
+
+        assert "2022-01-01" not in template
+        assert template.count("?") == 2
+        assert params == ("2022-01-01", "2022-02-01")
+
+    def test_template_stable_across_dates(self):
+        """Test template text is reusable for different date ranges."""
+        jan = {"start_date": datetime(2022, 1, 1), "end_date": datetime(2022, 2, 1),
+               "granularity": "weekly", "metric": "avg"}
+        mar = {"start_date": datetime(2022, 3, 1), "end_date": datetime(2022, 4, 1),
+               "granularity": "weekly", "metric": "avg"}
+
+        assert build_sql_params(jan, "fare_trend")[0] == build_sql_params(mar, "fare_trend")[0]
+
+    def test_sample_limit_is_param(self):
+        """Test sample rows limit is bound as an integer param."""
+        state = {
+            "start_date": datetime(2022, 1, 1),
+            "end_date": datetime(2022, 2, 1),
+            "limit": 5000,
+        }
+        template, params = build_sql_params(state, "sample_rows")
+
+        assert "LIMIT ?" in template
+        assert params[-1] == 1000
+
+    def test_render_matches_build_sql(self):
+        """Test rendering a template reproduces build_sql output."""
+        state = {
+            "start_date": datetime(2022, 1, 1),
+            "end_date": datetime(2022, 2, 1),
+            "limit": 50,
+        }
+        assert render_sql(*build_sql_params(state, "sample_rows")) == build_sql(state, "sample_rows")
+
+    def test_render_param_count_mismatch(self):
+        """Test rendering rejects mismatched params."""
+        with pytest.raises(ValueError):
+            render_sql("SELECT ? , ?", ("a",))
+
+
+class TestSafeTemplates:
+    """Test the closed set of builder templates."""
+
+    @pytest.mark.parametrize("intent", ["trip_frequency", "fare_trend", "tip_trend", "vendor_inactivity", "sample_rows"])
+    @pytest.mark.parametrize("granularity", ["daily", "weekly", "monthly"])
+    @pytest.mark.parametrize("metric", ["avg", "total"])
+    def test_every_template_is_registered(self, intent, granularity, metric):
+        """Test every template build_sql_params emits is in SAFE_TEMPLATES."""
+        state = {
+            "start_date": datetime(2022, 1, 1),
+            "end_date": datetime(2022, 2, 1),
+            "granularity": granularity,
+            "metric": metric,
+        }
+        template, _ = build_sql_params(state, intent)
+        assert template in SAFE_TEMPLATES
+
+    def test_best_day_template_is_registered(self):
+        """Test the total_amount variant is registered too."""
+        state = {
+            "start_date": datetime(2022, 1, 1),
+            "end_date": datetime(2022, 2, 1),
+            "granularity": "daily",
+            "metric": "avg",
+            "_postprocess": {"type": "best_day", "mode": "min_total_amount"},
+        }
+        assert build_sql_params(state, "fare_trend")[0] in SAFE_TEMPLATES
+
+    def test_rendered_sql_is_not_registered(self):
+        """Test SQL with inlined values must still pass the safety scan."""
+        state = {"start_date": datetime(2022, 1, 1), "end_date": datetime(2022, 2, 1), "granularity": "daily"}
+        assert build_sql(state, "trip_frequency") not in SAFE_TEMPLATES
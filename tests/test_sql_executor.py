@@ -6,7 +6,7 @@ import pytest
 import sqlite3
 from pathlib import Path
 
-from symbiote_lite.sql.executor import execute_sql_query, _default_db_path
+from symbiote_lite.sql.executor import execute_sql_query, _default_db_path, _get_connection
 
 
 class TestExecuteSQLQuery:
@@ -99,6 +99,48 @@ class TestExecuteSQLQuery:
             execute_sql_query("SELECT * FROM nonexistent", db_path=db_path)
 
 
+    def test_executor_binds_params(self, tmp_path):
+        """Test parameters are bound to placeholders."""
+        db_path = tmp_path / "test.sqlite"
+        conn = sqlite3.connect(str(db_path))
+        conn.execute("CREATE TABLE test (id INTEGER)")
+        conn.execute("INSERT INTO test VALUES (1), (2), (3)")
+        conn.commit()
+        conn.close()
+
+        df = execute_sql_query("SELECT * FROM test WHERE id >= ?", db_path=db_path, params=(2,))
+
+        assert list(df["id"]) == [2, 3]
+
+    def test_executor_reuses_connection(self, tmp_path):
+        """Test repeated queries against one DB share a cached connection."""
+        db_path = tmp_path / "test.sqlite"
+        conn = sqlite3.connect(str(db_path))
+        conn.execute("CREATE TABLE test (id INTEGER)")
+        conn.commit()
+        conn.close()
+
+        execute_sql_query("SELECT * FROM test", db_path=db_path)
+        first = _get_connection(db_path)
+        execute_sql_query("SELECT * FROM test", db_path=db_path)
+
+        assert _get_connection(db_path) is first
+
+    def test_executor_sees_new_rows(self, tmp_path):
+        """Test cached connection still sees rows written by other connections."""
+        db_path = tmp_path / "test.sqlite"
+        conn = sqlite3.connect(str(db_path))
+        conn.execute("CREATE TABLE test (id INTEGER)")
+        conn.commit()
+
+        assert len(execute_sql_query("SELECT * FROM test", db_path=db_path)) == 0
+        conn.execute("INSERT INTO test VALUES (1)")
+        conn.commit()
+        conn.close()
+
+        assert len(execute_sql_query("SELECT * FROM test", db_path=db_path)) == 1
+
+
 class TestDefaultDbPath:
     """Test default database path resolution."""
 
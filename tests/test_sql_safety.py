@@ -191,6 +191,16 @@ class TestSafeSelectOnly:
         with pytest.raises(ValueError, match="SELECT"):
             safe_select_only("EXEC sp_executesql 'DROP TABLE users'")
 
+    def test_blocks_embedded_mutation(self):
+        """Test mutations after a leading SELECT are blocked."""
+        with pytest.raises(ValueError, match="Unsafe"):
+            safe_select_only("SELECT 1; DROP TABLE taxi_trips")
+
+    def test_allows_keyword_substrings(self):
+        """Test keywords inside identifiers are not flagged."""
+        query = "SELECT updated_at, created_by FROM taxi_trips"
+        assert safe_select_only(query) == query
+
     def test_empty_query(self):
         """Test empty query is blocked."""
         with pytest.raises(ValueError):